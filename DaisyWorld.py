@@ -2,6 +2,9 @@ import pygame
 import random
 import math
 import copy
+import os
+
+from DaisyWorldModel import DEFAULT_SETTINGS, Daisyworld
 
 # --- Pygame Setup ---
 pygame.init()
@@ -31,128 +34,37 @@ COLOR_GRAPH_WHITE = (240, 240, 240) # Bright White
 COLOR_GRAPH_BLACK = (160, 160, 160) # Medium Grey
 
 # Fonts
-FONT_TITLE = pygame.font.SysFont('sans', 30)
-FONT_LARGE_TITLE = pygame.font.SysFont('sans', 50)
-FONT_LABEL = pygame.font.SysFont('sans', 18)
-FONT_VALUE = pygame.font.SysFont('monospace', 20)
-FONT_FORMULA = pygame.font.SysFont('monospace', 16)
-FONT_SETTINGS_TEXT = pygame.font.SysFont('sans', 22)
-FONT_SETTINGS_HEADER = pygame.font.SysFont('sans', 28, bold=True)
-FONT_SETTINGS_DESC = pygame.font.SysFont('sans', 16)
-
-
-# --- Default Settings ---
-DEFAULT_SETTINGS = {
-    'albedo_white':      {'value': 0.75, 'min': 0.5, 'max': 1.0, 'step': 0.05, 'format': '{:.2f}', 'desc': "Reflectivity of white daisies (higher is more reflective)."},
-    'albedo_black':      {'value': 0.25, 'min': 0.0, 'max': 0.5, 'step': 0.05, 'format': '{:.2f}', 'desc': "Reflectivity of black daisies (lower is more absorbent)."},
-    'albedo_ground':     {'value': 0.50, 'min': 0.0, 'max': 1.0, 'step': 0.05, 'format': '{:.2f}', 'desc': "Reflectivity of the bare ground."},
-    'death_rate':        {'value': 0.30, 'min': 0.1, 'max': 1.0, 'step': 0.05, 'format': '{:.2f}', 'desc': "Natural death rate of daisies. Higher is less stable."},
-    'start_luminosity':  {'value': 0.80, 'min': 0.4, 'max': 1.4, 'step': 0.05, 'format': '{:.2f}', 'desc': "The initial energy output of the sun."},
-    'luminosity_change': {'value': 0.0005, 'min': 0.0, 'max': 0.002, 'step': 0.0001, 'format': '{:.4f}', 'desc': "Rate of solar warming. Set to 0 for a constant sun."},
-    'heating_effect':    {'value': 20,   'min': 0,   'max': 50,  'step': 2,    'format': '{:d}', 'desc': "How much a daisy's color affects its local temperature."},
-    'stability_turns':   {'value': 5,  'min': 5,  'max': 500,'step': 5,   'format': '{:d}', 'desc': "Turns of no change before ending due to stability."},
-}
+class LazyFont:
+    """Stands in for a SysFont and only loads it the first time it's used.
+
+    The settings screen, the first frame drawn, already uses six of the eight
+    fonts, so this only keeps FONT_LABEL and FONT_VALUE, which the simulation
+    view needs, out of the time to the first frame. That is a millisecond or
+    two; most of the launch time is importing pygame and opening the window.
+    """
+    def __init__(self, name, size, bold=False):
+        self.args = (name, size, bold)
+        self.font = None
+
+    def __getattr__(self, attr):
+        if self.font is None:
+            self.font = pygame.font.SysFont(*self.args)
+        return getattr(self.font, attr)
+
+FONT_TITLE = LazyFont('sans', 30)
+FONT_LARGE_TITLE = LazyFont('sans', 50)
+FONT_LABEL = LazyFont('sans', 18)
+FONT_VALUE = LazyFont('monospace', 20)
+FONT_FORMULA = LazyFont('monospace', 16)
+FONT_SETTINGS_TEXT = LazyFont('sans', 22)
+FONT_SETTINGS_HEADER = LazyFont('sans', 28, bold=True)
+FONT_SETTINGS_DESC = LazyFont('sans', 16)
+
+
+# --- Settings ---
 # Make a deep copy for the current settings that can be changed
 current_settings = copy.deepcopy(DEFAULT_SETTINGS)
 
-
-# --- Daisyworld Model Parameters ---
-class Daisyworld:
-    def __init__(self):
-        self.history = {}
-        self.time = 0
-        self.reset(current_settings) # Initialize with current settings
-
-    def reset(self, settings):
-        """Resets the simulation with the given settings."""
-        self.albedo_white = settings['albedo_white']['value']
-        self.albedo_black = settings['albedo_black']['value']
-        self.albedo_ground = settings['albedo_ground']['value']
-        self.death_rate = settings['death_rate']['value']
-        self.solar_luminosity = settings['start_luminosity']['value']
-        self.luminosity_change_rate = settings['luminosity_change']['value']
-        self.heating_effect_factor = settings['heating_effect']['value']
-        self.stability_check_turns = settings['stability_turns']['value']
-        
-        self.frac_white = 0.01
-        self.frac_black = 0.01
-        self.frac_ground = 1 - (self.frac_white + self.frac_black)
-        
-        self.max_luminosity = 1.8
-        self.stefan_boltzmann = 5.67e-8
-        self.planetary_temp = 0
-        self.opt_temp = 22.5
-        self.min_temp = 5.0
-        self.max_temp = 40.0
-        self.time_step = 0.1
-        self.time = 0
-        self.history = {'time': [], 'temp': [], 'white': [], 'black': []}
-        self.end_reason = None # 'extinct', 'stable'
-        self.white_pop_history = []
-        self.black_pop_history = []
-
-    def get_planetary_albedo(self):
-        return (self.frac_white * self.albedo_white + self.frac_black * self.albedo_black + self.frac_ground * self.albedo_ground)
-
-    def get_planetary_temp(self, albedo):
-        solar_flux = 917
-        absorbed_flux = self.solar_luminosity * solar_flux * (1 - albedo)
-        temp_kelvin = (absorbed_flux / self.stefan_boltzmann) ** 0.25
-        return temp_kelvin - 273.15
-
-    def get_local_temp(self, planetary_temp, planetary_albedo, daisy_albedo):
-        return planetary_temp + self.heating_effect_factor * (planetary_albedo - daisy_albedo)
-
-    def get_growth_rate(self, temp):
-        if self.min_temp < temp < self.max_temp:
-            return 1.0 - 0.003265 * ((self.opt_temp - temp) ** 2)
-        return 0
-
-    def step(self):
-        if self.solar_luminosity < self.max_luminosity:
-            self.solar_luminosity += self.luminosity_change_rate
-        planetary_albedo = self.get_planetary_albedo()
-        self.planetary_temp = self.get_planetary_temp(planetary_albedo)
-        temp_white = self.get_local_temp(self.planetary_temp, planetary_albedo, self.albedo_white)
-        temp_black = self.get_local_temp(self.planetary_temp, planetary_albedo, self.albedo_black)
-        beta_white = self.get_growth_rate(temp_white)
-        beta_black = self.get_growth_rate(temp_black)
-        change_white = self.frac_white * (self.frac_ground * beta_white - self.death_rate)
-        change_black = self.frac_black * (self.frac_ground * beta_black - self.death_rate)
-        self.frac_white = max(0.0001, min(1, self.frac_white + change_white * self.time_step))
-        self.frac_black = max(0.0001, min(1, self.frac_black + change_black * self.time_step))
-        self.frac_ground = max(0, 1 - (self.frac_white + self.frac_black))
-        if self.frac_ground == 0:
-            total_daisies = self.frac_white + self.frac_black
-            if total_daisies > 1:
-                self.frac_white /= total_daisies
-                self.frac_black /= total_daisies
-        self.time += 1
-        self.history['time'].append(self.time)
-        self.history['temp'].append(self.planetary_temp)
-        self.history['white'].append(self.frac_white * 100)
-        self.history['black'].append(self.frac_black * 100)
-        
-        # --- End Condition Checks ---
-        if self.time > 500 and (self.frac_white + self.frac_black) < 0.01:
-            self.end_reason = 'extinct'
-        
-        # Update stability history
-        self.white_pop_history.append(self.frac_white)
-        self.black_pop_history.append(self.frac_black)
-        if len(self.white_pop_history) > self.stability_check_turns:
-            self.white_pop_history.pop(0)
-            self.black_pop_history.pop(0)
-
-        # Check for stability if the history buffer is full
-        if len(self.white_pop_history) == self.stability_check_turns:
-            white_delta = max(self.white_pop_history) - min(self.white_pop_history)
-            black_delta = max(self.black_pop_history) - min(self.black_pop_history)
-            stability_threshold = 0.0001
-            if white_delta < stability_threshold and black_delta < stability_threshold:
-                if (self.frac_white + self.frac_black) > 0.01: # Ensure it's not stable because everything is dead
-                     self.end_reason = 'stable'
-
 # --- UI & Drawing Functions ---
 
 def render_text_wrapped(surface, text, font, color, rect, line_spacing=1.2):
@@ -380,18 +292,29 @@ def draw_buttons(rect):
     return back_btn_rect
 
 # --- Main Game Loop ---
-def main():
+def main(scenario_settings=None, configure=None, world=None):
+    """Runs the viewer. With `scenario_settings` it skips the settings screen and
+    starts that scenario straight away; `configure(world)` is then applied to it.
+    `world` replaces the plain Daisyworld, e.g. with a StochasticDaisyworld."""
     global current_settings
     clock = pygame.time.Clock()
     running = True
     game_state = 'settings_screen'
-    world = Daisyworld()
+    if world is None:
+        world = Daisyworld(current_settings)
+    if scenario_settings is not None:
+        current_settings = scenario_settings
+        world.reset(current_settings)
+        if configure:
+            configure(world)
+        game_state = 'simulation'
     world_rect = pygame.Rect(20, 20, 750, 400)
     graph_rect = pygame.Rect(20, 440, 750, 340)
     info_rect = pygame.Rect(790, 20, 390, 760)
     button_rect = pygame.Rect(info_rect.left, info_rect.bottom - 60, info_rect.width, 50)
     world_surface = pygame.Surface((world_rect.width, world_rect.height))
     settings_buttons = {}
+    first_frame_exit = bool(os.environ.get('DAISYWORLD_EXIT_AFTER_FIRST_FRAME'))
 
     while running:
         for event in pygame.event.get():
@@ -445,6 +368,10 @@ def main():
             draw_end_screen(world)
 
         pygame.display.flip()
+        if first_frame_exit:
+            # Used by DaisyWorldStartup.py to time launch -> first frame
+            print("first frame", flush=True)
+            break
         clock.tick(60)
 
     pygame.quit()
@@ -0,0 +1,317 @@
+"""Batch runner for declarative Daisyworld experiments.
+
+An experiment file is JSON listing scenarios. Each scenario may set:
+
+* `settings`   - overrides for DEFAULT_SETTINGS values, e.g. {"death_rate": 0.4}
+* `sweep`      - setting name -> list of values; every combination is run
+* `luminosity` - {"start": .., "rate": .., "max": ..} for the sun's schedule
+* `forcing`    - {"luminosity": spec, "albedo_ground": spec} time-varying
+                 schedules, see DaisyWorldForcing.schedule_from_spec
+* `seeds`      - list of seeds, one run per seed
+* `stochastic` - {"noise": .., "luminosity_noise": .., "replicates": ..} runs the
+                 StochasticDaisyworld, with `replicates` runs per seed
+* `tabulated`  - true, or {"temp_points": .., "growth_points": ..}, runs the
+                 TabulatedDaisyworld lookup-table model instead. It is slower
+                 and can't use the kernel; it is there to check table accuracy
+* `stop`       - {"max_steps": .., "events": [..]} where events are names from
+                 STOP_EVENTS or {"species": "white", "below": 0.05} style thresholds.
+                 The model's own extinction and stability checks always apply;
+                 events are checked after every step, so a run with any stop
+                 events is stepped through Daisyworld.step instead of the kernel
+
+Top-level `defaults` supply any of these for every scenario; a scenario's
+dict-valued keys are merged into the defaults' key by key. `output`
+names the results table (CSV, relative to the experiment file). Runs with
+identical configurations are executed once and share their result.
+
+    python DaisyWorldBatch.py experiments/readme_scenarios.json
+    python DaisyWorldBatch.py experiments/readme_scenarios.json --view "A Frozen Planet"
+"""
+import argparse
+import copy
+import csv
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import DaisyWorldEvents
+import DaisyWorldForcing
+import DaisyWorldKernel
+from DaisyWorldModel import DEFAULT_SETTINGS, Daisyworld
+from DaisyWorldRandom import StochasticDaisyworld
+from DaisyWorldTables import TabulatedDaisyworld
+
+STOP_EVENTS = {
+    'outcome': DaisyWorldEvents.outcome_events,
+    'habitable_window': lambda: DaisyWorldEvents.habitable_window_events(terminal=True),
+    'extinction': lambda: [DaisyWorldEvents.extinction_event()],
+    'growth_stall': lambda: DaisyWorldEvents.growth_stall_events(terminal=True),
+}
+
+MERGED_KEYS = ('settings', 'sweep', 'luminosity', 'forcing', 'stochastic', 'stop')
+
+RESULT_COLUMNS = ['end_reason', 'outcome', 'steps', 'final_temp', 'final_white', 'final_black',
+                  'final_luminosity', 'max_white', 'max_black', 'events']
+
+
+# --- Planning ---
+
+def load_experiment(path):
+    with open(path) as f:
+        experiment = json.load(f)
+    experiment.setdefault('base_dir', os.path.dirname(os.path.abspath(path)))
+    return experiment
+
+
+def plan_runs(experiment):
+    """Expands every scenario into a flat list of run configurations."""
+    defaults = experiment.get('defaults', {})
+    base_dir = experiment.get('base_dir', '.')
+    runs = []
+    for scenario in experiment['scenarios']:
+        spec = {**defaults, **scenario}
+        for key in MERGED_KEYS:
+            spec[key] = {**defaults.get(key, {}), **scenario.get(key, {})}
+        for key in spec.get('settings', {}):
+            if key not in DEFAULT_SETTINGS:
+                raise ValueError(f"Scenario '{spec['name']}': unknown setting '{key}'")
+        sweep = spec.get('sweep', {})
+        for key in sweep:
+            if key not in DEFAULT_SETTINGS:
+                raise ValueError(f"Scenario '{spec['name']}': unknown sweep setting '{key}'")
+        stop = {'max_steps': 20000, 'events': [], **spec['stop']}
+        if spec.get('tabulated') and spec.get('stochastic'):
+            raise ValueError(f"Scenario '{spec['name']}': 'tabulated' and 'stochastic' can't be combined")
+        forcing = DaisyWorldForcing.resolve_spec_paths(spec.get('forcing', {}), base_dir)
+        for key in forcing:
+            if key not in ('luminosity', 'albedo_ground'):
+                raise ValueError(f"Scenario '{spec['name']}': can't force '{key}', only luminosity and albedo_ground")
+        for combo in itertools.product(*sweep.values()):
+            values = {key: params['value'] for key, params in DEFAULT_SETTINGS.items()}
+            values.update(spec.get('settings', {}))
+            values.update(zip(sweep.keys(), combo))
+            luminosity = dict(spec.get('luminosity', {}))
+            if 'start' in luminosity:
+                values['start_luminosity'] = luminosity.pop('start')
+            if 'rate' in luminosity:
+                values['luminosity_change'] = luminosity.pop('rate')
+            stochastic = dict(spec.get('stochastic', {}))
+            replicates = stochastic.pop('replicates', 1)
+            for seed in spec.get('seeds', [0]):
+                for replicate in range(replicates):
+                    runs.append({
+                        'scenario': spec['name'],
+                        'settings': values,
+                        'luminosity': luminosity,
+                        'forcing': forcing,
+                        'stochastic': stochastic,
+                        'tabulated': spec.get('tabulated', False),
+                        'seed': seed,
+                        'replicate': replicate,
+                        'stop': stop,
+                    })
+    return runs
+
+
+def run_key(run):
+    """A canonical string identifying everything that affects a run's result.
+
+    The scenario name never matters. Deterministic runs also leave out the
+    seed and replicate, so runs differing only in those share one result.
+    """
+    ignored = ('scenario',) if run.get('stochastic') else ('scenario', 'seed', 'replicate')
+    return json.dumps({k: v for k, v in run.items() if k not in ignored}, sort_keys=True)
+
+
+def make_settings(values):
+    """A full settings dict, as the UI uses, holding the given values."""
+    settings = copy.deepcopy(DEFAULT_SETTINGS)
+    for key, value in values.items():
+        settings[key]['value'] = value
+    return settings
+
+
+def make_stop_events(stop):
+    events = []
+    for spec in stop.get('events', []):
+        if isinstance(spec, str):
+            if spec not in STOP_EVENTS:
+                raise ValueError(f"Unknown stop event '{spec}', expected one of {sorted(STOP_EVENTS)}")
+            events.extend(STOP_EVENTS[spec]())
+            continue
+        if not isinstance(spec, dict) or 'species' not in spec or not ('above' in spec or 'below' in spec):
+            raise ValueError(f"Stop event {spec!r} should be a name or {{\"species\": .., \"above\" or \"below\": ..}}")
+        for direction in ('above', 'below'):
+            if direction in spec:
+                above, below = DaisyWorldEvents.population_events(spec['species'], spec[direction], terminal=True)
+                events.append(above if direction == 'above' else below)
+    return events
+
+
+def configure_world(world, run):
+    """Applies the parts of a run that aren't plain settings to a freshly reset world."""
+    if 'max' in run['luminosity']:
+        world.max_luminosity = run['luminosity']['max']
+    forcing = run.get('forcing', {})
+    if forcing:
+        schedules = {key: DaisyWorldForcing.schedule_from_spec(spec) for key, spec in forcing.items()}
+        DaisyWorldForcing.apply_forcing(world, run['stop']['max_steps'], **schedules)
+
+
+# --- Execution ---
+
+def outcome(world):
+    """Classifies a finished run the same way the end screen does.
+
+    A run that stopped at max_steps without ending is 'horizon': it was
+    never decided.
+    """
+    if world.end_reason is None:
+        return 'horizon'
+    if world.end_reason == 'stable':
+        return 'stable'
+    if not world.time:
+        return None
+    if world.peak_white < 2 and world.peak_black < 2:
+        return 'failure_to_launch'
+    if world.planetary_temp > world.max_temp:
+        return 'heat_death'
+    if world.planetary_temp < world.min_temp:
+        return 'freeze_death'
+    return None
+
+
+def start_run(run):
+    """A fresh world set up for `run`, ready to be stepped."""
+    if run.get('stochastic'):
+        world = StochasticDaisyworld(make_settings(run['settings']), run['seed'], run.get('replicate', 0), **run['stochastic'])
+    elif run.get('tabulated'):
+        options = run['tabulated'] if isinstance(run['tabulated'], dict) else {}
+        world = TabulatedDaisyworld(make_settings(run['settings']), **options)
+    else:
+        world = Daisyworld(make_settings(run['settings']))
+    configure_world(world, run)
+    world.add_event(make_stop_events(run['stop']))
+    return world
+
+
+def summarize(world):
+    """The summary row for a finished (or stopped) world.
+
+    Built from the world's state and running peaks rather than its history,
+    so worlds advanced with record=False summarize the same way.
+    """
+    ran = world.time > 0
+    return {
+        'end_reason': world.end_reason,
+        'outcome': outcome(world),
+        'steps': world.time,
+        'final_temp': world.planetary_temp if ran else None,
+        'final_white': world.frac_white * 100 if ran else None,
+        'final_black': world.frac_black * 100 if ran else None,
+        'final_luminosity': world.solar_luminosity,
+        'max_white': world.peak_white if ran else None,
+        'max_black': world.peak_black if ran else None,
+        'events': ';'.join(f"{r['name']}@{r['time']:.2f}" for r in world.event_log),
+    }
+
+
+def execute_run(run):
+    """Runs one configuration headless and returns its summary row."""
+    world = start_run(run)
+    DaisyWorldKernel.run(world, run['stop']['max_steps'], record=False)
+    return summarize(world)
+
+
+class ResultCache:
+    """Run results keyed by `run_key`, optionally persisted to a JSON file."""
+    def __init__(self, path=None):
+        self.path = path
+        self.results = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.results = json.load(f)
+
+    def get(self, run):
+        return self.results.get(run_key(run))
+
+    def put(self, run, result):
+        self.results[run_key(run)] = result
+
+    def save(self):
+        if self.path:
+            with open(self.path, 'w') as f:
+                json.dump(self.results, f)
+
+
+def execute(runs, workers=None, cache=None):
+    """Executes the unique, uncached runs in parallel and returns a result per run."""
+    cache = cache if cache is not None else ResultCache()
+    pending = {}
+    for run in runs:
+        if cache.get(run) is None:
+            pending.setdefault(run_key(run), run)
+    if workers == 1 or len(pending) <= 1:
+        results = [execute_run(run) for run in pending.values()]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(execute_run, pending.values()))
+    for run, result in zip(pending.values(), results):
+        cache.put(run, result)
+    return [cache.get(run) for run in runs]
+
+
+def write_table(path, runs, results):
+    setting_keys = list(DEFAULT_SETTINGS)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['scenario', 'seed', 'replicate'] + setting_keys + ['max_luminosity'] + RESULT_COLUMNS)
+        for run, result in zip(runs, results):
+            writer.writerow([run['scenario'], run['seed'], run['replicate']] + [run['settings'][k] for k in setting_keys]
+                            + [run['luminosity'].get('max', '')] + [result[c] for c in RESULT_COLUMNS])
+
+
+def run_experiment(path, workers=None, output=None):
+    """Plans, executes and tabulates an experiment file; returns the table path."""
+    experiment = load_experiment(path)
+    base = os.path.dirname(os.path.abspath(path))
+    cache_path = experiment.get('cache')
+    cache = ResultCache(os.path.join(base, cache_path) if cache_path else None)
+    runs = plan_runs(experiment)
+    results = execute(runs, workers, cache)
+    cache.save()
+    output = output or os.path.join(base, experiment.get('output', os.path.splitext(os.path.basename(path))[0] + '_results.csv'))
+    write_table(output, runs, results)
+    return output, runs, results
+
+
+def view_scenario(path, name):
+    """Opens the pygame viewer straight into the first run of the named scenario."""
+    runs = [run for run in plan_runs(load_experiment(path)) if run['scenario'] == name]
+    if not runs:
+        raise ValueError(f"No scenario named '{name}' in {path}")
+    import DaisyWorld # opens the window, so only imported when viewing
+    run = runs[0]
+    DaisyWorld.main(make_settings(run['settings']), lambda world: configure_world(world, run), start_run(run))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a Daisyworld experiment file headless.")
+    parser.add_argument('experiment', help="path to the experiment JSON file")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument('--output', help="results table path, overriding the file's 'output'")
+    parser.add_argument('--view', metavar='SCENARIO', help="open this scenario in the viewer instead")
+    args = parser.parse_args()
+    if args.view:
+        view_scenario(args.experiment, args.view)
+        return
+    output, runs, results = run_experiment(args.experiment, args.workers, args.output)
+    print(f"{len(runs)} runs ({len({run_key(r) for r in runs})} unique) -> {output}")
+    for run, result in zip(runs, results):
+        print(f"  {run['scenario']:<24} {str(result['outcome']):<18} {result['steps']:>6} steps  {result['final_temp']:7.2f} C")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Threshold events for the Daisyworld model.
+
+An event watches one quantity of the world after every step and records the
+moment it crosses a threshold. The crossing time is linearly interpolated
+between the two steps that bracket it, so it is not rounded to whole steps.
+Events marked `terminal`, or whose callback returns True, stop the run.
+An event with `after` set ignores the world until its time passes `after`.
+"""
+
+
+class Event:
+    def __init__(self, name, func, threshold=0.0, direction=0, terminal=False, callback=None, once=False, after=None):
+        self.name = name
+        self.func = func
+        self.threshold = threshold
+        self.direction = direction # +1 rising only, -1 falling only, 0 both
+        self.terminal = terminal
+        self.callback = callback
+        self.once = once
+        self.after = after # ignore steps up to this time, like the built-in extinction check
+        self.reset()
+
+    def reset(self):
+        """Forgets the previous sample, ready for a new run."""
+        self.prev_value = None
+        self.prev_time = None
+        self.fired = False
+
+    def update(self, world):
+        """Samples the world and returns a crossing record, or None."""
+        time = world.time
+        if self.after is not None and time <= self.after:
+            return None
+        value = self.func(world) - self.threshold
+        record = None
+        if self.prev_value is None and self.after is not None:
+            # First step past the grace period: an already crossed threshold counts now.
+            if (value > 0 and self.direction > 0) or (value <= 0 and self.direction < 0):
+                record = {'name': self.name, 'time': time, 'step': time,
+                          'direction': self.direction, 'threshold': self.threshold}
+                self.fired = True
+        if self.prev_value is not None and not (self.once and self.fired):
+            rising = self.prev_value <= 0 < value
+            falling = self.prev_value > 0 >= value
+            if (rising and self.direction >= 0) or (falling and self.direction <= 0):
+                frac = self.prev_value / (self.prev_value - value)
+                record = {
+                    'name': self.name,
+                    'time': self.prev_time + frac * (time - self.prev_time),
+                    'step': time,
+                    'direction': 1 if rising else -1,
+                    'threshold': self.threshold,
+                }
+                self.fired = True
+        self.prev_value = value
+        self.prev_time = time
+        return record
+
+
+# --- Standard Events ---
+
+def _species_value(species):
+    if species == 'white':
+        return lambda w: w.frac_white
+    if species == 'black':
+        return lambda w: w.frac_black
+    if species == 'total':
+        return lambda w: w.frac_white + w.frac_black
+    raise ValueError(f"Unknown species '{species}', expected 'white', 'black' or 'total'")
+
+
+def habitable_window_events(terminal=False, callback=None):
+    """Planetary temperature falling below min_temp or rising above max_temp."""
+    return [
+        Event('temp_below_min', lambda w: w.planetary_temp - w.min_temp, direction=-1, terminal=terminal, callback=callback),
+        Event('temp_above_max', lambda w: w.planetary_temp - w.max_temp, direction=1, terminal=terminal, callback=callback),
+    ]
+
+
+def population_events(species, threshold, terminal=False, callback=None):
+    """A species' cover fraction first rising above or falling below `threshold`."""
+    value = _species_value(species)
+    return [
+        Event(f'{species}_above', value, threshold, direction=1, terminal=terminal, callback=callback, once=True),
+        Event(f'{species}_below', value, threshold, direction=-1, terminal=terminal, callback=callback, once=True),
+    ]
+
+
+def _window_margin(local_temp):
+    # Positive while the local temp is inside (min_temp, max_temp), where the growth
+    # rate is non-zero. Unlike the clipped growth rate itself this is continuous, so
+    # the crossing time interpolates cleanly.
+    return lambda w: min(local_temp(w) - w.min_temp, w.max_temp - local_temp(w))
+
+
+def growth_stall_events(terminal=False, callback=None):
+    """A species' growth rate dropping to zero (its local temp left the window)."""
+    return [
+        Event('white_growth_zero', _window_margin(lambda w: w.temp_white), direction=-1, terminal=terminal, callback=callback),
+        Event('black_growth_zero', _window_margin(lambda w: w.temp_black), direction=-1, terminal=terminal, callback=callback),
+    ]
+
+
+def extinction_event(threshold=0.01, grace=500, callback=None):
+    """Total daisy cover falling below `threshold` once `grace` steps have passed.
+
+    The default grace matches Daisyworld.step's own extinction check; without
+    it the seed cover of a cold start counts as extinct before it can grow.
+    """
+    return Event('extinct', _species_value('total'), threshold, direction=-1, terminal=True, callback=callback,
+                 once=True, after=grace)
+
+
+def outcome_events():
+    """Events that mark how a run's outcome comes about.
+
+    Leaving the habitable window is only recorded: daisies can still pull the
+    temperature back, so stopping there would misclassify the run.
+    """
+    return habitable_window_events() + [extinction_event()]
@@ -0,0 +1,63 @@
+# -*- mode: python ; coding: utf-8 -*-
+# Startup-optimized build: python -m PyInstaller DaisyWorldFast.spec
+#
+# Unlike DaisyWorld.spec this builds a one-dir app (dist/DaisyWorld/), so
+# nothing has to be unpacked to a temp dir on each launch, and skips UPX,
+# whose decompression also costs time at startup. Modules the viewer never
+# imports are left out to shrink the bundle and the import path. Leaving out
+# pygame.mixer also stops pygame.init() from opening the audio device.
+# Check the result with: python DaisyWorldStartup.py dist/DaisyWorld/DaisyWorld
+
+EXCLUDES = [
+    # pygame modules the viewer doesn't use
+    'pygame.mixer', 'pygame.mixer_music', 'pygame.midi', 'pygame.camera', 'pygame.sndarray',
+    'pygame.surfarray', 'pygame._camera_opencv',
+    'pygame._camera_vidcapture', 'pygame.examples', 'pygame.tests', 'pygame.docs', 'pygame.ftfont',
+    # optional dependencies of pygame and of the headless tools
+    'numpy', 'numba', 'OpenGL',
+    # stdlib packages the viewer never imports
+    'tkinter', 'unittest', 'pydoc', 'doctest', 'http', 'xmlrpc',
+    'sqlite3', 'lib2to3', 'distutils', 'multiprocessing', 'concurrent', 'asyncio', 'ctypes.test',
+]
+
+a = Analysis(
+    ['DaisyWorld.py'],
+    pathex=[],
+    binaries=[],
+    datas=[],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=EXCLUDES,
+    noarchive=False,
+    optimize=1,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='DaisyWorld',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='DaisyWorld',
+)
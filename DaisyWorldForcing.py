@@ -0,0 +1,182 @@
+"""Time-varying forcing schedules for luminosity and ground albedo.
+
+A schedule describes a value over time; `compile(steps)` turns it into a list
+with one value per step, computed once before the run. `Daisyworld.step` and
+the kernel only index into that list, so forcing adds no Python calls to the
+hot loop. Step n uses element n-1, matching the existing warming, where the
+first step already sees `start + rate`.
+
+Schedules can be nested: a sinusoid or stochastic schedule oscillates around
+a `base`, which is either a constant or another schedule.
+"""
+import csv
+import math
+import os
+
+from DaisyWorldRandom import CounterRNG
+
+
+class Schedule:
+    def compile(self, steps):
+        """The value at each of the first `steps` steps, as a list of floats."""
+        raise NotImplementedError
+
+
+def _compile_base(base, steps):
+    if isinstance(base, Schedule):
+        return base.compile(steps)
+    return [float(base)] * steps
+
+
+class Constant(Schedule):
+    def __init__(self, value):
+        self.value = value
+
+    def compile(self, steps):
+        return [float(self.value)] * steps
+
+
+class Ramp(Schedule):
+    """The built-in warming sun: `start`, increased by `rate` each step until it reaches `limit`."""
+    def __init__(self, start, rate, limit=1.8):
+        self.start = start
+        self.rate = rate
+        self.limit = limit
+
+    def compile(self, steps):
+        # Accumulate exactly as Daisyworld.step does, so the two agree to the bit.
+        values = []
+        value = self.start
+        for _ in range(steps):
+            if value < self.limit:
+                value += self.rate
+            values.append(value)
+        return values
+
+
+class Piecewise(Schedule):
+    """Linear interpolation between (time, value) points, held flat beyond both ends."""
+    def __init__(self, points):
+        if not points:
+            raise ValueError("Piecewise schedule needs at least one point")
+        self.points = sorted((float(t), float(v)) for t, v in points)
+
+    def compile(self, steps):
+        values = []
+        points = self.points
+        j = 0
+        for n in range(1, steps + 1):
+            while j < len(points) - 1 and points[j + 1][0] <= n:
+                j += 1
+            t0, v0 = points[j]
+            if n <= t0 or j == len(points) - 1:
+                values.append(v0)
+            else:
+                t1, v1 = points[j + 1]
+                values.append(v0 + (v1 - v0) * (n - t0) / (t1 - t0))
+        return values
+
+
+class Sinusoid(Schedule):
+    """An orbital-style cycle: base + amplitude * sin(2*pi*(t/period + phase))."""
+    def __init__(self, base, amplitude, period, phase=0.0):
+        self.base = base
+        self.amplitude = amplitude
+        self.period = period
+        self.phase = phase
+
+    def compile(self, steps):
+        base = _compile_base(self.base, steps)
+        w = 2 * math.pi / self.period
+        return [b + self.amplitude * math.sin(w * n + 2 * math.pi * self.phase) for n, b in enumerate(base, 1)]
+
+
+class Stochastic(Schedule):
+    """Red noise around a base: an AR(1) process with std `sigma` and correlation time `tau` steps."""
+    def __init__(self, base, sigma, tau=1.0, seed=0):
+        self.base = base
+        self.sigma = sigma
+        self.tau = tau
+        self.seed = seed
+
+    def compile(self, steps):
+        base = _compile_base(self.base, steps)
+        draws = CounterRNG(self.seed).normals(0, steps)
+        phi = math.exp(-1 / self.tau) if self.tau > 0 else 0.0
+        kick = self.sigma * math.sqrt(1 - phi * phi)
+        noise = self.sigma * draws[0]
+        values = []
+        for b, draw in zip(base, draws[1:] + [0.0]):
+            values.append(b + noise)
+            noise = phi * noise + kick * draw
+        return values
+
+
+class FromFile(Schedule):
+    """Values read from a CSV file with `time` and value columns, interpolated per step."""
+    def __init__(self, path, column='value', time_column='time'):
+        with open(path, newline='') as f:
+            rows = list(csv.DictReader(f))
+        if not rows:
+            raise ValueError(f"Forcing file '{path}' has no rows")
+        for name in (time_column, column):
+            if name not in rows[0]:
+                raise ValueError(f"Forcing file '{path}' has no '{name}' column")
+        self.path = path
+        self.piecewise = Piecewise([(row[time_column], row[column]) for row in rows])
+
+    def compile(self, steps):
+        return self.piecewise.compile(steps)
+
+
+# --- Declarative Specs ---
+
+def resolve_spec_paths(spec, base_dir):
+    """A copy of `spec` with relative file paths made absolute against `base_dir`."""
+    if not isinstance(spec, dict):
+        return spec
+    spec = {key: resolve_spec_paths(value, base_dir) for key, value in spec.items()}
+    if spec.get('kind') == 'file':
+        spec['path'] = os.path.abspath(os.path.join(base_dir, spec['path']))
+    return spec
+
+
+def schedule_from_spec(spec):
+    """Builds a schedule from a JSON-style spec, e.g. {"kind": "sinusoid", "base": 1.0, ...}.
+
+    Plain numbers are constants and `base` may itself be a nested spec.
+    """
+    if isinstance(spec, (int, float)):
+        return Constant(spec)
+    spec = dict(spec)
+    kind = spec.pop('kind', None)
+    if 'base' in spec:
+        spec['base'] = schedule_from_spec(spec['base'])
+    if kind == 'constant':
+        return Constant(**spec)
+    if kind == 'ramp':
+        return Ramp(**spec)
+    if kind == 'piecewise':
+        return Piecewise(**spec)
+    if kind == 'sinusoid':
+        return Sinusoid(**spec)
+    if kind == 'stochastic':
+        return Stochastic(**spec)
+    if kind == 'file':
+        return FromFile(**spec)
+    raise ValueError(f"Unknown schedule kind '{kind}', expected constant, ramp, piecewise, sinusoid, stochastic or file")
+
+
+def _clamp(values, low, high):
+    return [min(max(v, low), high) for v in values]
+
+
+def apply_forcing(world, steps, luminosity=None, albedo_ground=None):
+    """Compiles the given schedules for `steps` steps and attaches them to `world`.
+
+    Luminosity is clamped to >= 0 and albedo to [0, 1], so a sinusoid or noise
+    swinging past them can't drive the absorbed flux, and with it the
+    temperature, negative or complex.
+    """
+    world.set_forcing(luminosity=_clamp(luminosity.compile(steps), 0.0, math.inf) if luminosity is not None else None,
+                      albedo_ground=_clamp(albedo_ground.compile(steps), 0.0, 1.0) if albedo_ground is not None else None)
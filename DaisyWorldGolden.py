@@ -0,0 +1,332 @@
+"""Golden trajectories from the reference model, and a checker for other engines.
+
+`build` runs every distinct configuration of an experiment file through the
+reference `Daisyworld.step` (`StochasticDaisyworld.step` for stochastic
+runs) and saves each trajectory step by step. It stores planetary
+temperature, white and black cover, the end reason and the step count.
+Floats are written with repr, so they read back exactly.
+
+`check` replays the corpus on one or more engines and compares every metric
+against that engine's tolerance. It then reports each engine's speed
+relative to `Daisyworld.step` over the same runs:
+
+* `step`   - Daisyworld.step itself; catches changes to the model
+* `kernel` - DaisyWorldKernel.run
+* `tables` - DaisyWorldTables.TabulatedDaisyworld
+* `web`    - the model class copied into DaisyWorldWeb.py, loaded without pygame
+* `js`     - the Daisyworld class in index.html, run under Node.js
+
+Engines skip runs they can't express. The web and JavaScript copies have
+no forcing, noise or stop events, and `js` is skipped when node isn't
+installed. Engines in REPORT_ONLY are known to disagree; their failures are
+printed but don't change the exit code.
+
+    python DaisyWorldGolden.py build
+    python DaisyWorldGolden.py check --engine kernel --engine tables
+"""
+import argparse
+import ast
+import gzip
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time as _time
+
+import DaisyWorldKernel
+from DaisyWorldBatch import load_experiment, plan_runs, run_key, start_run
+from DaisyWorldModel import DEFAULT_SETTINGS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_EXPERIMENT = os.path.join(HERE, 'experiments', 'readme_scenarios.json')
+DEFAULT_CORPUS = os.path.join(HERE, 'experiments', 'golden', 'readme_scenarios.json.gz')
+METRICS = ('temp', 'white', 'black')
+
+# Largest allowed difference per metric: temp in C, white/black in percentage
+# points of cover, steps in whole steps. 0 means bit-for-bit. The end reason
+# must always match.
+EXACT = {'temp': 0, 'white': 0, 'black': 0, 'steps': 0}
+TOLERANCES = {
+    'step': EXACT,
+    # Numba squares with a multiply where CPython calls pow, see DaisyWorldKernel
+    'kernel': {'temp': 1e-6, 'white': 1e-6, 'black': 1e-6, 'steps': 0} if DaisyWorldKernel.HAVE_JIT else EXACT,
+    'tables': {'temp': 0.01, 'white': 0.05, 'black': 0.05, 'steps': 2},
+    'web': EXACT,
+    'js': {'temp': 1e-6, 'white': 1e-6, 'black': 1e-6, 'steps': 1},
+}
+# Engines known to disagree with the reference, whose failures are reported
+# but don't fail the check. index.html updates bare ground a step late and
+# has its own stability check.
+REPORT_ONLY = {'js'}
+
+
+# --- Building ---
+
+def _trajectory(world):
+    return {
+        'end_reason': world.end_reason,
+        'steps': world.time,
+        'temp': list(world.history['temp']),
+        'white': list(world.history['white']),
+        'black': list(world.history['black']),
+    }
+
+
+def build(experiment_path=DEFAULT_EXPERIMENT, corpus_path=DEFAULT_CORPUS):
+    """Runs each distinct configuration through the reference model and saves the corpus."""
+    entries = {}
+    for run in plan_runs(load_experiment(experiment_path)):
+        run = {**run, 'tabulated': False}
+        key = run_key(run)
+        if key in entries:
+            entries[key]['scenarios'].append(run['scenario'])
+            continue
+        world = start_run(run)
+        world.run(run['stop']['max_steps'])
+        entries[key] = {'scenarios': [run['scenario']], 'run': run, **_trajectory(world)}
+    corpus = {'experiment': os.path.relpath(experiment_path, os.path.dirname(os.path.abspath(corpus_path))),
+              'trajectories': list(entries.values())}
+    os.makedirs(os.path.dirname(os.path.abspath(corpus_path)), exist_ok=True)
+    # No timestamp or name in the gzip header, so rebuilding an unchanged corpus gives the same bytes.
+    with open(corpus_path, 'wb') as raw, gzip.GzipFile('', 'wb', fileobj=raw, mtime=0) as f:
+        f.write(json.dumps(corpus).encode())
+    return corpus
+
+
+def load_corpus(path=DEFAULT_CORPUS):
+    with gzip.open(path, 'rt') as f:
+        return json.load(f)
+
+
+# --- Engines ---
+# Each engine takes a list of runs and returns one (trajectory, seconds) pair
+# per run, or None for runs it can't express.
+
+def _timed(runs, supports, replay):
+    results = []
+    for run in runs:
+        if not supports(run):
+            results.append(None)
+            continue
+        start = _time.perf_counter()
+        world = replay(run)
+        results.append((_trajectory(world), _time.perf_counter() - start))
+    return results
+
+
+def _plain(run):
+    # A run only the plain model describes: no forcing, noise, tables or stop events.
+    return not (run['forcing'] or run['stochastic'] or run.get('tabulated') or run['stop'].get('events'))
+
+
+def _step(run):
+    world = start_run(run)
+    world.run(run['stop']['max_steps'])
+    return world
+
+
+def _kernel(run):
+    world = start_run(run)
+    DaisyWorldKernel.run(world, run['stop']['max_steps'])
+    return world
+
+
+def _tables(run):
+    world = start_run({**run, 'tabulated': True})
+    world.run(run['stop']['max_steps'])
+    return world
+
+
+def load_web_model(path=os.path.join(HERE, 'DaisyWorldWeb.py')):
+    """The Daisyworld class from DaisyWorldWeb.py, without running the module's pygame setup."""
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    classes = [node for node in tree.body if isinstance(node, ast.ClassDef) and node.name == 'Daisyworld']
+    if not classes:
+        raise ValueError(f"No Daisyworld class in {path}")
+    namespace = {'current_settings': DEFAULT_SETTINGS}
+    exec(compile(ast.Module(classes, []), path, 'exec'), namespace)
+    return namespace['Daisyworld']
+
+
+def _web(runs):
+    model = load_web_model()
+
+    def replay(run):
+        world = model()
+        world.reset({key: {'value': value} for key, value in run['settings'].items()})
+        world.max_luminosity = run['luminosity'].get('max', world.max_luminosity)
+        while world.end_reason is None and world.time < run['stop']['max_steps']:
+            world.step()
+        return world
+    return _timed(runs, _plain, replay)
+
+
+JS_DRIVER = '''
+const input = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+%s
+const out = input.runs.map(run => {
+    const settings = {};
+    for (const [key, value] of Object.entries(run.settings)) settings[key] = { value: value };
+    let best = Infinity, world = null;
+    for (let i = 0; i < input.repeat; i++) {
+        const start = process.hrtime.bigint();
+        world = new Daisyworld(settings);
+        while (world.end_reason === null && world.time < run.max_steps) world.step();
+        best = Math.min(best, Number(process.hrtime.bigint() - start) / 1e9);
+    }
+    return { end_reason: world.end_reason, steps: world.time, temp: world.history.temp,
+             white: world.history.white, black: world.history.black, seconds: best };
+});
+process.stdout.write(JSON.stringify(out));
+'''
+
+
+def load_js_model(path=os.path.join(HERE, 'index.html')):
+    """The source of the Daisyworld class in index.html, with the settings helper it uses."""
+    with open(path, encoding='utf-8') as f:
+        html = f.read()
+    parts = []
+    for start, stop in (('function deepCopySettings', 'let currentSettings'), ('class Daisyworld {', 'let world = new Daisyworld')):
+        match = re.search(re.escape(start) + '.*?(?=' + re.escape(stop) + ')', html, re.S)
+        if match is None:
+            raise ValueError(f"Can't find '{start}' in {path}")
+        parts.append(match.group(0))
+    return '\n'.join(parts)
+
+
+def _js_supports(run):
+    # The page hard-codes the 1.8 luminosity cap.
+    return _plain(run) and run['luminosity'].get('max', 1.8) == 1.8
+
+
+def _js(runs, repeat=1):
+    node = shutil.which('node')
+    if node is None:
+        return [None] * len(runs)
+    chosen = [run for run in runs if _js_supports(run)]
+    payload = {'repeat': repeat, 'runs': [{'settings': run['settings'], 'max_steps': run['stop']['max_steps']} for run in chosen]}
+    proc = subprocess.run([node, '-e', JS_DRIVER % load_js_model()], input=json.dumps(payload),
+                          capture_output=True, text=True, check=True)
+    outputs = iter(json.loads(proc.stdout))
+    results = []
+    for run in runs:
+        if not _js_supports(run):
+            results.append(None)
+            continue
+        out = next(outputs)
+        results.append(({key: out[key] for key in ('end_reason', 'steps') + METRICS}, out['seconds']))
+    return results
+
+
+def engines():
+    """Engine name -> function replaying a list of runs."""
+    return {
+        'step': lambda runs: _timed(runs, lambda run: True, _step),
+        'kernel': lambda runs: _timed(runs, lambda run: True, _kernel),
+        'tables': lambda runs: _timed(runs, lambda run: not run['stochastic'], _tables),
+        'web': _web,
+        'js': _js,
+    }
+
+
+def _best(best, results):
+    # Keeps the fastest time per run across repeated replays.
+    if best is None:
+        return results
+    return [None if r is None else (r[0], min(r[1], b[1])) for r, b in zip(results, best)]
+
+
+# --- Checking ---
+
+def compare(golden, trajectory, tolerance):
+    """The worst difference per metric between two trajectories, and whether all are within tolerance."""
+    errors = {}
+    for metric in METRICS:
+        errors[metric] = max((abs(a - b) for a, b in zip(golden[metric], trajectory[metric])), default=0.0)
+    errors['steps'] = abs(golden['steps'] - trajectory['steps'])
+    ok = golden['end_reason'] == trajectory['end_reason'] and all(errors[m] <= tolerance[m] for m in errors)
+    return errors, ok
+
+
+def check(corpus, names=None, repeat=5):
+    """Replays the corpus on each named engine; returns a report dict per engine."""
+    available = engines()
+    names = names or list(available)
+    for name in names:
+        if name not in available:
+            raise ValueError(f"Unknown engine '{name}', expected one of {sorted(available)}")
+    runs = [entry['run'] for entry in corpus['trajectories']]
+    # Each engine alternates with the reference `repeat` times and both keep
+    # their best time per run, so a slow or noisy moment hits them alike.
+    replays = {}
+    for name in names:
+        best, reference = None, None
+        for _ in range(repeat):
+            best = _best(best, available[name](runs))
+            reference = _best(reference, available['step'](runs))
+        replays[name] = best, reference
+    reports = {}
+    for name, (results, reference) in replays.items():
+        report = {'checked': 0, 'skipped': 0, 'failures': [], 'engine_seconds': 0.0, 'step_seconds': 0.0,
+                  'errors': {**{metric: 0.0 for metric in METRICS}, 'steps': 0}}
+        for entry, result, ref in zip(corpus['trajectories'], results, reference):
+            if result is None:
+                report['skipped'] += 1
+                continue
+            trajectory, seconds = result
+            errors, ok = compare(entry, trajectory, TOLERANCES[name])
+            report['checked'] += 1
+            report['engine_seconds'] += seconds
+            report['step_seconds'] += ref[1]
+            for metric, error in errors.items():
+                report['errors'][metric] = max(report['errors'][metric], error)
+            if not ok:
+                report['failures'].append({'scenarios': entry['scenarios'], 'errors': errors,
+                                           'end_reason': (entry['end_reason'], trajectory['end_reason'])})
+        report['speedup'] = report['step_seconds'] / report['engine_seconds'] if report['engine_seconds'] else None
+        reports[name] = report
+    return reports
+
+
+def print_report(reports):
+    print(f"{'engine':<8} {'runs':>5} {'skip':>5} {'max |dT| C':>11} {'white pp':>10} {'black pp':>10} {'steps':>6} {'speedup':>8}  result")
+    for name, report in reports.items():
+        errors = report['errors']
+        speedup = f"{report['speedup']:.2f}x" if report['speedup'] else '-'
+        failed = len(report['failures'])
+        result = 'ok' if not failed else f"FAIL ({failed}, report only)" if name in REPORT_ONLY else f"FAIL ({failed})"
+        if not report['checked']:
+            result = 'no runs'
+        print(f"{name:<8} {report['checked']:>5} {report['skipped']:>5} {errors['temp']:>11.3g} {errors['white']:>10.3g} "
+              f"{errors['black']:>10.3g} {errors['steps']:>6} {speedup:>8}  {result}")
+        for failure in report['failures']:
+            golden, got = failure['end_reason']
+            print(f"    {', '.join(failure['scenarios'])}: end {golden} -> {got}, "
+                  + ', '.join(f"{metric} {error:.3g}" for metric, error in failure['errors'].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or check the golden Daisyworld trajectory corpus.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    build_parser = sub.add_parser('build', help="regenerate the corpus from Daisyworld.step")
+    build_parser.add_argument('--experiment', default=DEFAULT_EXPERIMENT)
+    build_parser.add_argument('--corpus', default=DEFAULT_CORPUS)
+    check_parser = sub.add_parser('check', help="replay the corpus on engines and compare")
+    check_parser.add_argument('--corpus', default=DEFAULT_CORPUS)
+    check_parser.add_argument('--engine', action='append', help=f"engine to check, repeatable; default all of {', '.join(TOLERANCES)}")
+    check_parser.add_argument('--repeat', type=int, default=5, help="timing repeats per run, best is kept")
+    args = parser.parse_args()
+    if args.command == 'build':
+        corpus = build(args.experiment, args.corpus)
+        print(f"{len(corpus['trajectories'])} trajectories -> {args.corpus}")
+        return
+    reports = check(load_corpus(args.corpus), args.engine, args.repeat)
+    print_report(reports)
+    sys.exit(1 if any(report['failures'] for name, report in reports.items() if name not in REPORT_ONLY) else 0)
+
+
+if __name__ == '__main__':
+    main()
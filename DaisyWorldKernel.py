@@ -0,0 +1,301 @@
+"""A compiled step kernel for long headless runs.
+
+`run_steps` advances the Daisyworld physics, stability check and extinction
+check K steps at a time over plain floats, with no method calls or attribute
+lookups inside the loop. When Numba is installed it is JIT-compiled; otherwise
+the very same function runs as ordinary Python, which is still faster than
+calling `Daisyworld.step` in a loop. Run this file to benchmark both.
+
+Models that add noise, like DaisyWorldRandom.StochasticDaisyworld, run
+through the kernel too: their `kernel_noise` method hands over the noise
+levels and a precomputed array of normal draws for the chunk.
+
+Both paths perform the same floating point operations in the same order as
+`Daisyworld.step`. The Python path is bit-for-bit identical to it. Under Numba
+`x ** 2` becomes x*x, while CPython calls libm pow, which rounds differently
+for roughly 1 in 1000 arguments. A compiled run can therefore drift from
+`step` in the last bit, which was seen in 1 of 300 random settings, without
+changing the outcome.
+"""
+import math
+import time as _time
+from array import array
+
+try:
+    import numpy as np
+    from numba import njit
+    HAVE_JIT = True
+except ImportError:
+    np = None
+    HAVE_JIT = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+from DaisyWorldModel import Daisyworld
+
+END_NONE, END_EXTINCT, END_STABLE = 0, 1, 2
+END_REASONS = {END_NONE: None, END_EXTINCT: 'extinct', END_STABLE: 'stable'}
+END_CODES = {reason: code for code, reason in END_REASONS.items()}
+NOISE_CHUNK = 256 # steps of noise drawn per kernel call for models with `kernel_noise`
+
+
+if HAVE_JIT:
+    @njit(cache=True)
+    def _spread(buf):
+        low = buf[0]
+        high = buf[0]
+        for i in range(1, len(buf)):
+            low = min(low, buf[i])
+            high = max(high, buf[i])
+        return high - low
+else:
+    def _spread(buf):
+        return max(buf) - min(buf)
+
+
+@njit(cache=True)
+def run_steps(k, lum, frac_white, frac_black, frac_ground, time,
+              lum_rate, lum_max, albedo_white, albedo_black, albedo_ground, death_rate, heating,
+              time_step, opt_temp, min_temp, max_temp, stefan_boltzmann, turns,
+              win_white, win_black, win_count, win_head, out_temp, out_white, out_black, record,
+              lum_schedule, albedo_schedule, noise, lum_noise, draws, peak_white, peak_black):
+    """Runs up to k steps and stops early at the first end condition.
+
+    `win_white`/`win_black` are ring buffers of length `turns` holding the
+    stability history; `win_head` is the next slot to write. Non-empty
+    `lum_schedule`/`albedo_schedule` arrays replace the linear warming and the
+    fixed ground albedo, indexed by time. A non-empty `draws` array holds
+    three normal draws per step (white, black, luminosity) for demographic
+    noise `noise` and luminosity noise `lum_noise`, as StochasticDaisyworld
+    applies them. `peak_white`/`peak_black` carry the highest cover so far
+    in percent. Returns the new state followed by the end code and the
+    number of steps taken.
+    """
+    n_lum = len(lum_schedule)
+    n_albedo = len(albedo_schedule)
+    stochastic = len(draws) > 0
+    scale = noise / math.sqrt(time_step)
+    planetary_temp = 0.0
+    temp_white = 0.0
+    temp_black = 0.0
+    end_code = 0
+    steps = 0
+    while steps < k:
+        if n_lum > 0:
+            lum = lum_schedule[min(time, n_lum - 1)]
+        elif lum < lum_max:
+            lum += lum_rate
+        if n_albedo > 0:
+            albedo_ground = albedo_schedule[min(time, n_albedo - 1)]
+        planetary_albedo = frac_white * albedo_white + frac_black * albedo_black + frac_ground * albedo_ground
+        if stochastic:
+            absorbed_flux = lum * (1 + lum_noise * draws[3 * steps + 2]) * 917 * (1 - planetary_albedo)
+        else:
+            absorbed_flux = lum * 917 * (1 - planetary_albedo)
+        planetary_temp = (absorbed_flux / stefan_boltzmann) ** 0.25 - 273.15
+        temp_white = planetary_temp + heating * (planetary_albedo - albedo_white)
+        temp_black = planetary_temp + heating * (planetary_albedo - albedo_black)
+        beta_white = 0.0
+        if min_temp < temp_white < max_temp:
+            beta_white = 1.0 - 0.003265 * ((opt_temp - temp_white) ** 2)
+        beta_black = 0.0
+        if min_temp < temp_black < max_temp:
+            beta_black = 1.0 - 0.003265 * ((opt_temp - temp_black) ** 2)
+        change_white = frac_white * (frac_ground * beta_white - death_rate)
+        change_black = frac_black * (frac_ground * beta_black - death_rate)
+        if stochastic:
+            births_white = frac_white * frac_ground * beta_white
+            births_black = frac_black * frac_ground * beta_black
+            change_white += scale * math.sqrt(max(0.0, births_white + frac_white * death_rate)) * draws[3 * steps]
+            change_black += scale * math.sqrt(max(0.0, births_black + frac_black * death_rate)) * draws[3 * steps + 1]
+        frac_white = max(0.0001, min(1.0, frac_white + change_white * time_step))
+        frac_black = max(0.0001, min(1.0, frac_black + change_black * time_step))
+        frac_ground = max(0.0, 1 - (frac_white + frac_black))
+        if frac_ground == 0:
+            total_daisies = frac_white + frac_black
+            if total_daisies > 1:
+                frac_white /= total_daisies
+                frac_black /= total_daisies
+        time += 1
+        white = frac_white * 100
+        black = frac_black * 100
+        if record:
+            out_temp[steps] = planetary_temp
+            out_white[steps] = white
+            out_black[steps] = black
+        if white > peak_white:
+            peak_white = white
+        if black > peak_black:
+            peak_black = black
+        steps += 1
+
+        if time > 500 and (frac_white + frac_black) < 0.01:
+            end_code = 1
+
+        win_white[win_head] = frac_white
+        win_black[win_head] = frac_black
+        win_head = (win_head + 1) % turns
+        if win_count < turns:
+            win_count += 1
+        if win_count == turns:
+            if _spread(win_white) < 0.0001 and _spread(win_black) < 0.0001:
+                if (frac_white + frac_black) > 0.01:
+                    end_code = 2
+        if end_code != 0:
+            break
+    return (lum, frac_white, frac_black, frac_ground, albedo_ground, planetary_temp, temp_white, temp_black,
+            time, win_count, win_head, end_code, steps, peak_white, peak_black)
+
+
+def _buffer(n):
+    if HAVE_JIT:
+        return np.zeros(n)
+    return [0.0] * n
+
+
+def _floats(buf, n):
+    # The first n values as Python floats, in one C-level call either way.
+    return buf[:n].tolist() if HAVE_JIT else buf[:n]
+
+
+def _schedule(values):
+    # Forcing schedules are array('d') from Daisyworld.set_forcing, viewed here
+    # without a copy; only the per-chunk noise draws arrive as lists.
+    if values is None:
+        return _buffer(0)
+    if HAVE_JIT:
+        if isinstance(values, array):
+            return np.frombuffer(values, dtype=np.float64)
+        return np.asarray(values, dtype=np.float64)
+    return values
+
+
+def is_reference_world(world):
+    """True if the kernel reproduces `world`'s physics.
+
+    That is unmodified Daisyworld physics, or the physics of the nearest class
+    defining `kernel_noise`, which describes its changes to the kernel.
+    """
+    cls = type(world)
+    reference = next((klass for klass in cls.__mro__ if 'kernel_noise' in vars(klass)), Daisyworld)
+    return all(getattr(cls, name) is getattr(reference, name)
+               for name in ('step', 'get_planetary_albedo', 'get_planetary_temp', 'get_local_temp', 'get_growth_rate',
+                           'get_population_changes'))
+
+
+def advance(world, k, record=True):
+    """Advances `world` by up to k steps (fewer if it ends) and returns the steps taken.
+
+    Worlds with registered events, or with overridden physics, are stepped one
+    call at a time through `Daisyworld.step` since the kernel can't see either.
+    """
+    if world.end_reason is not None:
+        return 0
+    if world.events or not is_reference_world(world):
+        steps = 0
+        while steps < k and world.end_reason is None:
+            world.step()
+            steps += 1
+        return steps
+    if hasattr(world, 'kernel_noise'):
+        # Drawing the noise costs more than the physics, so draw a piece at a
+        # time: a run ending early then wastes at most one piece of draws.
+        steps = 0
+        while steps < k and world.end_reason is None:
+            steps += _advance_kernel(world, min(NOISE_CHUNK, k - steps), record)
+        return steps
+    return _advance_kernel(world, k, record)
+
+
+def _advance_kernel(world, k, record):
+    turns = world.stability_check_turns
+    win_white, win_black = _buffer(turns), _buffer(turns)
+    count = len(world.white_pop_history)
+    for i in range(count):
+        win_white[i] = world.white_pop_history[i]
+        win_black[i] = world.black_pop_history[i]
+    head = count % turns
+    out_temp, out_white, out_black = (_buffer(k), _buffer(k), _buffer(k)) if record else (_buffer(0), _buffer(0), _buffer(0))
+    noise, lum_noise, draws = world.kernel_noise(k) if hasattr(world, 'kernel_noise') else (0.0, 0.0, None)
+
+    (world.solar_luminosity, world.frac_white, world.frac_black, world.frac_ground, world.albedo_ground, world.planetary_temp,
+     world.temp_white, world.temp_black, world.time, count, head, end_code, steps,
+     world.peak_white, world.peak_black) = run_steps(
+        k, float(world.solar_luminosity), float(world.frac_white), float(world.frac_black), float(world.frac_ground), world.time,
+        float(world.luminosity_change_rate), float(world.max_luminosity), float(world.albedo_white), float(world.albedo_black),
+        float(world.albedo_ground), float(world.death_rate), float(world.heating_effect_factor), float(world.time_step),
+        float(world.opt_temp), float(world.min_temp), float(world.max_temp), float(world.stefan_boltzmann), turns,
+        win_white, win_black, count, head, out_temp, out_white, out_black, record,
+        _schedule(world.luminosity_schedule), _schedule(world.albedo_ground_schedule),
+        float(noise), float(lum_noise), _schedule(draws), float(world.peak_white), float(world.peak_black))
+
+    if record:
+        first = world.time - steps + 1
+        world.history['time'].extend(range(first, world.time + 1))
+        world.history['temp'].extend(_floats(out_temp, steps))
+        world.history['white'].extend(_floats(out_white, steps))
+        world.history['black'].extend(_floats(out_black, steps))
+    order = list(range(count)) if count < turns else [(head + i) % turns for i in range(turns)]
+    world.white_pop_history = [float(win_white[i]) for i in order]
+    world.black_pop_history = [float(win_black[i]) for i in order]
+    world.end_reason = END_REASONS[end_code]
+    return steps
+
+
+def run(world, max_steps, chunk=4096, record=True):
+    """Like `Daisyworld.run`, but advances through the kernel in chunks."""
+    while world.end_reason is None and world.time < max_steps:
+        advance(world, min(chunk, max_steps - world.time), record)
+    return world.end_reason
+
+
+def advance_ensemble(worlds, k, max_steps, record=True):
+    """Advances every unfinished world in lock-step by up to k steps, capped at `max_steps`.
+
+    `max_steps` is one limit for all worlds or a list with one per world.
+    Returns the steps each world took; a world that took none is finished.
+    """
+    limits = max_steps if isinstance(max_steps, (list, tuple)) else [max_steps] * len(worlds)
+    return [advance(world, min(k, limit - world.time), record) if world.time < limit else 0
+            for world, limit in zip(worlds, limits)]
+
+
+def run_ensemble(worlds, max_steps, chunk=4096, record=True):
+    """Runs a batch of worlds to completion, chunk by chunk; returns their end reasons."""
+    while any(advance_ensemble(worlds, chunk, max_steps, record)):
+        pass
+    return [world.end_reason for world in worlds]
+
+
+def benchmark(runs=20, settings=None):
+    """Times `Daisyworld.step` against the kernel over the same runs, in steps/sec.
+
+    The kernel is timed twice: summary-only (`record=False`) and writing the
+    history back into `world.history` as step() does.
+    """
+    world = Daisyworld(settings)
+    run(world, 1, record=False) # trigger JIT compilation outside the timed section
+    results = {}
+    for name, runner in (('step', lambda w: w.run(10 ** 9)), ('kernel', lambda w: run(w, 10 ** 9, record=False)),
+                         ('kernel_recorded', lambda w: run(w, 10 ** 9))):
+        total_steps = 0
+        start = _time.perf_counter()
+        for _ in range(runs):
+            world = Daisyworld(settings)
+            runner(world)
+            total_steps += world.time
+        results[name] = total_steps / (_time.perf_counter() - start)
+    results['speedup'] = results['kernel'] / results['step']
+    results['recorded_speedup'] = results['kernel_recorded'] / results['step']
+    return results
+
+
+if __name__ == '__main__':
+    result = benchmark()
+    print(f"JIT: {'numba' if HAVE_JIT else 'not installed, pure Python fallback'}")
+    print(f"Daisyworld.step: {result['step']:>12,.0f} steps/sec")
+    print(f"Kernel:          {result['kernel']:>12,.0f} steps/sec ({result['speedup']:.1f}x, record=False)")
+    print(f"Kernel, history: {result['kernel_recorded']:>12,.0f} steps/sec ({result['recorded_speedup']:.1f}x, record=True)")
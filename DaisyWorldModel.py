@@ -0,0 +1,177 @@
+"""The Daisyworld model itself, free of any pygame dependency.
+
+DaisyWorld.py draws this model; batch and headless tools import it directly.
+"""
+from array import array
+
+# --- Default Settings ---
+DEFAULT_SETTINGS = {
+    'albedo_white':      {'value': 0.75, 'min': 0.5, 'max': 1.0, 'step': 0.05, 'format': '{:.2f}', 'desc': "Reflectivity of white daisies (higher is more reflective)."},
+    'albedo_black':      {'value': 0.25, 'min': 0.0, 'max': 0.5, 'step': 0.05, 'format': '{:.2f}', 'desc': "Reflectivity of black daisies (lower is more absorbent)."},
+    'albedo_ground':     {'value': 0.50, 'min': 0.0, 'max': 1.0, 'step': 0.05, 'format': '{:.2f}', 'desc': "Reflectivity of the bare ground."},
+    'death_rate':        {'value': 0.30, 'min': 0.1, 'max': 1.0, 'step': 0.05, 'format': '{:.2f}', 'desc': "Natural death rate of daisies. Higher is less stable."},
+    'start_luminosity':  {'value': 0.80, 'min': 0.4, 'max': 1.4, 'step': 0.05, 'format': '{:.2f}', 'desc': "The initial energy output of the sun."},
+    'luminosity_change': {'value': 0.0005, 'min': 0.0, 'max': 0.002, 'step': 0.0001, 'format': '{:.4f}', 'desc': "Rate of solar warming. Set to 0 for a constant sun."},
+    'heating_effect':    {'value': 20,   'min': 0,   'max': 50,  'step': 2,    'format': '{:d}', 'desc': "How much a daisy's color affects its local temperature."},
+    'stability_turns':   {'value': 5,  'min': 5,  'max': 500,'step': 5,   'format': '{:d}', 'desc': "Turns of no change before ending due to stability."},
+}
+
+
+# --- Daisyworld Model Parameters ---
+class Daisyworld:
+    def __init__(self, settings=None):
+        self.history = {}
+        self.time = 0
+        self.events = [] # DaisyWorldEvents.Event instances checked after every step
+        self.reset(settings if settings is not None else DEFAULT_SETTINGS)
+
+    def reset(self, settings):
+        """Resets the simulation with the given settings."""
+        self.albedo_white = settings['albedo_white']['value']
+        self.albedo_black = settings['albedo_black']['value']
+        self.albedo_ground = settings['albedo_ground']['value']
+        self.death_rate = settings['death_rate']['value']
+        self.solar_luminosity = settings['start_luminosity']['value']
+        self.luminosity_change_rate = settings['luminosity_change']['value']
+        self.heating_effect_factor = settings['heating_effect']['value']
+        self.stability_check_turns = settings['stability_turns']['value']
+        
+        self.frac_white = 0.01
+        self.frac_black = 0.01
+        self.frac_ground = 1 - (self.frac_white + self.frac_black)
+        
+        self.max_luminosity = 1.8
+        self.stefan_boltzmann = 5.67e-8
+        self.planetary_temp = 0
+        self.opt_temp = 22.5
+        self.min_temp = 5.0
+        self.max_temp = 40.0
+        self.time_step = 0.1
+        self.time = 0
+        self.history = {'time': [], 'temp': [], 'white': [], 'black': []}
+        self.end_reason = None # 'extinct', 'stable', or the name of a terminal event
+        self.white_pop_history = []
+        self.black_pop_history = []
+        self.temp_white = 0
+        self.temp_black = 0
+        self.peak_white = 0.0 # highest cover so far, in percent, so summaries don't need the history
+        self.peak_black = 0.0
+        self.event_log = []
+        for event in self.events:
+            event.reset()
+        self.luminosity_schedule = None # per-step arrays from DaisyWorldForcing, replacing the linear warming
+        self.albedo_ground_schedule = None
+
+    def set_forcing(self, luminosity=None, albedo_ground=None):
+        """Drives luminosity and/or ground albedo from precompiled per-step arrays.
+
+        Step n uses element n-1; runs longer than an array hold its last value.
+        The values are stored once as array('d'), which the kernel can use
+        without copying.
+        """
+        self.luminosity_schedule = array('d', luminosity) if luminosity is not None else None
+        self.albedo_ground_schedule = array('d', albedo_ground) if albedo_ground is not None else None
+
+    def add_event(self, event):
+        """Registers an event (or list of events) to be checked after every step."""
+        if isinstance(event, (list, tuple)):
+            self.events.extend(event)
+        else:
+            self.events.append(event)
+        return event
+
+    def get_planetary_albedo(self):
+        return (self.frac_white * self.albedo_white + self.frac_black * self.albedo_black + self.frac_ground * self.albedo_ground)
+
+    def get_planetary_temp(self, albedo):
+        solar_flux = 917
+        absorbed_flux = self.solar_luminosity * solar_flux * (1 - albedo)
+        temp_kelvin = (absorbed_flux / self.stefan_boltzmann) ** 0.25
+        return temp_kelvin - 273.15
+
+    def get_local_temp(self, planetary_temp, planetary_albedo, daisy_albedo):
+        return planetary_temp + self.heating_effect_factor * (planetary_albedo - daisy_albedo)
+
+    def get_growth_rate(self, temp):
+        if self.min_temp < temp < self.max_temp:
+            return 1.0 - 0.003265 * ((self.opt_temp - temp) ** 2)
+        return 0
+
+    def get_population_changes(self, beta_white, beta_black):
+        change_white = self.frac_white * (self.frac_ground * beta_white - self.death_rate)
+        change_black = self.frac_black * (self.frac_ground * beta_black - self.death_rate)
+        return change_white, change_black
+
+    def step(self):
+        if self.luminosity_schedule is not None:
+            self.solar_luminosity = self.luminosity_schedule[min(self.time, len(self.luminosity_schedule) - 1)]
+        elif self.solar_luminosity < self.max_luminosity:
+            self.solar_luminosity += self.luminosity_change_rate
+        if self.albedo_ground_schedule is not None:
+            self.albedo_ground = self.albedo_ground_schedule[min(self.time, len(self.albedo_ground_schedule) - 1)]
+        planetary_albedo = self.get_planetary_albedo()
+        self.planetary_temp = self.get_planetary_temp(planetary_albedo)
+        temp_white = self.get_local_temp(self.planetary_temp, planetary_albedo, self.albedo_white)
+        temp_black = self.get_local_temp(self.planetary_temp, planetary_albedo, self.albedo_black)
+        self.temp_white, self.temp_black = temp_white, temp_black
+        beta_white = self.get_growth_rate(temp_white)
+        beta_black = self.get_growth_rate(temp_black)
+        change_white, change_black = self.get_population_changes(beta_white, beta_black)
+        self.frac_white = max(0.0001, min(1, self.frac_white + change_white * self.time_step))
+        self.frac_black = max(0.0001, min(1, self.frac_black + change_black * self.time_step))
+        self.frac_ground = max(0, 1 - (self.frac_white + self.frac_black))
+        if self.frac_ground == 0:
+            total_daisies = self.frac_white + self.frac_black
+            if total_daisies > 1:
+                self.frac_white /= total_daisies
+                self.frac_black /= total_daisies
+        self.time += 1
+        self.history['time'].append(self.time)
+        self.history['temp'].append(self.planetary_temp)
+        white, black = self.frac_white * 100, self.frac_black * 100
+        self.history['white'].append(white)
+        self.history['black'].append(black)
+        if white > self.peak_white:
+            self.peak_white = white
+        if black > self.peak_black:
+            self.peak_black = black
+        
+        # --- End Condition Checks ---
+        if self.time > 500 and (self.frac_white + self.frac_black) < 0.01:
+            self.end_reason = 'extinct'
+        
+        # Update stability history
+        self.white_pop_history.append(self.frac_white)
+        self.black_pop_history.append(self.frac_black)
+        if len(self.white_pop_history) > self.stability_check_turns:
+            self.white_pop_history.pop(0)
+            self.black_pop_history.pop(0)
+
+        # Check for stability if the history buffer is full
+        if len(self.white_pop_history) == self.stability_check_turns:
+            white_delta = max(self.white_pop_history) - min(self.white_pop_history)
+            black_delta = max(self.black_pop_history) - min(self.black_pop_history)
+            stability_threshold = 0.0001
+            if white_delta < stability_threshold and black_delta < stability_threshold:
+                if (self.frac_white + self.frac_black) > 0.01: # Ensure it's not stable because everything is dead
+                     self.end_reason = 'stable'
+
+        if self.events:
+            self.check_events()
+
+    def check_events(self):
+        """Records event crossings for this step and stops the run if one asks to."""
+        for event in self.events:
+            record = event.update(self)
+            if record is None:
+                continue
+            self.event_log.append(record)
+            stop = event.callback(self, record) if event.callback else False
+            if (event.terminal or stop) and self.end_reason is None:
+                self.end_reason = event.name
+
+    def run(self, max_steps):
+        """Steps until an end condition is met or `max_steps` have elapsed."""
+        while self.end_reason is None and self.time < max_steps:
+            self.step()
+        return self.end_reason
@@ -0,0 +1,140 @@
+"""Reproducible random streams and a stochastic Daisyworld.
+
+`CounterRNG` is counter-based: draw n of stream s under seed k is a pure
+function of (k, s, n), computed by SplitMix64 hashing. There is no hidden
+generator state to hand between processes. Replicate i of an ensemble always
+uses stream i, so its trajectory is the same whether the ensemble runs
+serially, on 64 worker processes, or split across machines.
+
+`StochasticDaisyworld` adds demographic noise to the birth/death terms and
+noise to the sun's luminosity. It takes its draws in blocks from its own
+stream, and hands the kernel the same draws through `kernel_noise`, so
+DaisyWorldKernel runs it bit-for-bit like its own `step`.
+
+When numpy is installed the hashing is done on uint64 arrays, a block of
+counters at a time. The Box-Muller transform still goes through `math`, so
+the draws are identical with or without numpy.
+"""
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from DaisyWorldKernel import run_ensemble
+from DaisyWorldModel import Daisyworld
+
+MASK = (1 << 64) - 1
+GOLDEN = 0x9E3779B97F4A7C15
+
+
+def _mix(z):
+    # SplitMix64 finalizer: a bijective 64-bit hash with good avalanche.
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK
+    return z ^ (z >> 31)
+
+
+def _mix_array(z):
+    # _mix on a uint64 array, whose arithmetic wraps mod 2**64 like the masks above.
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _uniform_array(key, start, count):
+    counters = np.arange(start, start + count, dtype=np.uint64) * np.uint64(GOLDEN)
+    z = _mix_array(np.uint64(key) + counters)
+    return (z >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+
+
+def _box_muller(u):
+    sqrt, log, cos, two_pi = math.sqrt, math.log, math.cos, 2 * math.pi
+    return [sqrt(-2.0 * log(1.0 - a)) * cos(two_pi * b) for a, b in zip(u[0::2], u[1::2])]
+
+
+class CounterRNG:
+    def __init__(self, seed, stream=0):
+        self.seed = seed
+        self.stream = stream
+        self.key = _mix((_mix((seed + GOLDEN) & MASK) + stream * 0xD1B54A32D192ED03) & MASK)
+
+    def uniforms(self, start, count):
+        """Uniform draws in [0, 1) for counters start .. start+count-1."""
+        if np is not None:
+            return _uniform_array(self.key, start, count).tolist()
+        key = self.key
+        return [(_mix((key + n * GOLDEN) & MASK) >> 11) * 2.0 ** -53 for n in range(start, start + count)]
+
+    def normals(self, start, count):
+        """Standard normal draws for counters start .. start+count-1 (Box-Muller, two uniforms each)."""
+        return _box_muller(self.uniforms(2 * start, 2 * count))
+
+
+def spawn(seed, count):
+    """Independent streams 0 .. count-1 under one seed, e.g. one per replicate."""
+    return [CounterRNG(seed, stream) for stream in range(count)]
+
+
+# --- Stochastic Model ---
+
+class StochasticDaisyworld(Daisyworld):
+    """A Daisyworld with demographic noise and a noisy sun.
+
+    Each step adds `noise * sqrt(birth + death) * N(0, 1) / sqrt(time_step)` to
+    a species' rate of change, an Euler-Maruyama step whose variance grows
+    with the number of births and deaths, as it would for a finite population
+    of roughly 1/noise^2 sites. The luminosity seen by each step is multiplied
+    by `1 + luminosity_noise * N(0, 1)`, without changing the underlying trend.
+    """
+    BLOCK = 1024 # steps of draws fetched at a time
+
+    def __init__(self, settings=None, seed=0, replicate=0, noise=0.02, luminosity_noise=0.01):
+        self.rng = CounterRNG(seed, replicate)
+        self.noise = noise
+        self.luminosity_noise = luminosity_noise
+        super().__init__(settings)
+
+    def reset(self, settings):
+        super().reset(settings)
+        self.draws = []
+        self.draws_start = 0
+
+    def _draw(self, slot):
+        # Three draws per step: white, black, luminosity. Indexing by time keeps
+        # draw n of a run fixed no matter how the run was chunked.
+        index = 3 * self.time + slot - self.draws_start
+        if not 0 <= index < len(self.draws):
+            self.draws_start = 3 * self.time
+            self.draws = self.rng.normals(self.draws_start, 3 * self.BLOCK)
+            index = slot
+        return self.draws[index]
+
+    def kernel_noise(self, steps):
+        """(noise, luminosity_noise, draws) for the next `steps` steps, as DaisyWorldKernel.run_steps takes them."""
+        return self.noise, self.luminosity_noise, self.rng.normals(3 * self.time, 3 * steps)
+
+    def get_planetary_temp(self, albedo):
+        luminosity = self.solar_luminosity
+        self.solar_luminosity = luminosity * (1 + self.luminosity_noise * self._draw(2))
+        try:
+            return super().get_planetary_temp(albedo)
+        finally:
+            self.solar_luminosity = luminosity
+
+    def get_population_changes(self, beta_white, beta_black):
+        change_white, change_black = super().get_population_changes(beta_white, beta_black)
+        scale = self.noise / math.sqrt(self.time_step)
+        births_white = self.frac_white * self.frac_ground * beta_white
+        births_black = self.frac_black * self.frac_ground * beta_black
+        change_white += scale * math.sqrt(max(0.0, births_white + self.frac_white * self.death_rate)) * self._draw(0)
+        change_black += scale * math.sqrt(max(0.0, births_black + self.frac_black * self.death_rate)) * self._draw(1)
+        return change_white, change_black
+
+
+def run_replicates(settings, replicates, max_steps, seed=0, noise=0.02, luminosity_noise=0.01, record=True):
+    """Runs `replicates` independent stochastic worlds, replicate i on stream i."""
+    worlds = [StochasticDaisyworld(settings, seed, i, noise, luminosity_noise) for i in range(replicates)]
+    run_ensemble(worlds, max_steps, record=record)
+    return worlds
@@ -0,0 +1,452 @@
+"""A small local HTTP/JSON service for running Daisyworld simulations.
+
+Requests use the same scenario format as experiment files (see
+DaisyWorldBatch): `settings`, `luminosity`, `forcing`, `stop` and, for
+/sweep, `sweep`.
+
+    GET  /health  service status
+    POST /run     one run; {"stream": true} streams the trajectory back as
+                  NDJSON lines of {"chunk": ...} followed by {"result": ...}
+    POST /sweep   every combination of `sweep`; returns all summaries
+
+Requests that arrive within a few milliseconds of each other are coalesced
+into one ensemble batch and stepped in lock-step in a worker thread, and
+identical runs share a single job. Summaries are kept in a settings-keyed
+ResultCache, so repeated requests are answered without stepping at all.
+
+Only streaming runs record their trajectory, and only until each chunk is
+sent; everything else is summarized from the world's running state.
+
+Malformed requests, including settings outside the ranges the settings
+screen allows, get a 400. A run that fails while stepping gets a 500 with
+its error; the other runs in its batch carry on. Requests are capped at
+MAX_STEPS steps per run, MAX_RUNS runs and MAX_TOTAL_STEPS steps in all.
+
+    python DaisyWorldServer.py --port 8765
+"""
+import argparse
+import asyncio
+import json
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import DaisyWorldForcing
+from DaisyWorldBatch import ResultCache, make_stop_events, plan_runs, run_key, start_run, summarize
+from DaisyWorldKernel import advance
+from DaisyWorldModel import DEFAULT_SETTINGS
+
+MAX_BODY = 1 << 20
+MAX_STEPS = 200000 # per run
+MAX_RUNS = 1000 # per request, counting sweep combinations, seeds and replicates
+MAX_TOTAL_STEPS = 20000000 # per request, runs x max_steps
+INT_SETTINGS = ('stability_turns',)
+STATUS = {200: 'OK', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+CORS_HEADERS = 'Access-Control-Allow-Origin: *\r\nAccess-Control-Allow-Headers: Content-Type\r\nAccess-Control-Allow-Methods: GET, POST, OPTIONS\r\n'
+
+
+class Job:
+    def __init__(self, run):
+        self.run = run
+        self.key = run_key(run)
+        self.result = asyncio.get_running_loop().create_future()
+        self.streams = [] # one asyncio.Queue per streaming client
+
+
+class SimulationService:
+    def __init__(self, batch_window=0.005, max_batch=256, chunk=500, cache=None):
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.chunk = chunk
+        self.cache = cache if cache is not None else ResultCache()
+        self.pending = {} # key -> Job waiting for the next batch
+        self.running = {} # key -> Job in the batch being stepped
+        self.batches = 0
+        self.wakeup = asyncio.Event()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.batcher = asyncio.get_running_loop().create_task(self._batcher())
+
+    # --- Submitting work ---
+
+    def plan(self, spec, allow_sweep=False):
+        """Validates a request body and expands it into runs."""
+        if not isinstance(spec, dict):
+            raise ValueError("Request body must be a JSON object")
+        if 'sweep' in spec and not allow_sweep:
+            raise ValueError("Use /sweep for requests with a 'sweep'")
+        _validate(spec)
+        runs = plan_runs({'scenarios': [{**spec, 'name': 'request'}]})
+        for run in runs:
+            make_stop_events(run['stop'])
+            for forcing in run['forcing'].values():
+                DaisyWorldForcing.schedule_from_spec(forcing)
+        return runs
+
+    def submit(self, run, stream=False):
+        """Queues a run and returns (future summary, stream queue or None)."""
+        if not stream:
+            cached = self.cache.get(run)
+            if cached is not None:
+                future = asyncio.get_running_loop().create_future()
+                future.set_result(cached)
+                return future, None
+        key = run_key(run)
+        job = self.pending.get(key)
+        if job is None and not stream:
+            job = self.running.get(key) # a stream must see every chunk, so it can't join mid-run
+        if job is None:
+            job = self.pending[key] = Job(run)
+            self.wakeup.set()
+        queue = None
+        if stream:
+            queue = asyncio.Queue()
+            job.streams.append(queue)
+        return job.result, queue
+
+    # --- Batching ---
+
+    async def _batcher(self):
+        while True:
+            await self.wakeup.wait()
+            await asyncio.sleep(self.batch_window) # let concurrent requests pile up
+            self.wakeup.clear()
+            jobs = list(self.pending.values())[:self.max_batch]
+            for job in jobs:
+                del self.pending[job.key]
+                self.running[job.key] = job
+            if self.pending:
+                self.wakeup.set()
+            try:
+                await self._run_batch(jobs)
+            except Exception as exc:
+                for job in jobs:
+                    if not job.result.done():
+                        job.result.set_exception(exc)
+                    for queue in job.streams:
+                        queue.put_nowait(None)
+            finally:
+                for job in jobs:
+                    self.running.pop(job.key, None)
+
+    async def _run_batch(self, jobs):
+        loop = asyncio.get_running_loop()
+        self.batches += 1
+        started = []
+        for job in jobs:
+            try:
+                started.append((job, start_run(job.run)))
+            except Exception as exc:
+                _fail(job, exc)
+        jobs = [job for job, _ in started]
+        worlds = [world for _, world in started]
+        while True:
+            steps, errors = await loop.run_in_executor(self.executor, _advance_batch, worlds, self.chunk,
+                                                       [job.run['stop']['max_steps'] for job in jobs],
+                                                       [bool(job.streams) for job in jobs])
+            for i, (job, world) in enumerate(zip(jobs, worlds)):
+                if steps[i] and job.streams:
+                    chunk = {name: list(values) for name, values in world.history.items()}
+                    for queue in job.streams:
+                        queue.put_nowait(chunk)
+                for values in world.history.values():
+                    values.clear() # summarize() works from the world's state, so nothing is kept
+            if any(errors):
+                for job, error in zip(jobs, errors):
+                    if error is not None:
+                        _fail(job, error)
+                keep = [i for i, error in enumerate(errors) if error is None]
+                jobs, worlds = [jobs[i] for i in keep], [worlds[i] for i in keep]
+                steps = [steps[i] for i in keep]
+            if not any(steps):
+                break
+        for job, world in zip(jobs, worlds):
+            result = summarize(world)
+            self.cache.put(job.run, result)
+            job.result.set_result(result)
+            for queue in job.streams:
+                queue.put_nowait(None)
+
+    # --- HTTP ---
+
+    async def handle(self, reader, writer):
+        try:
+            try:
+                method, path, body = await _read_request(reader)
+            except (ValueError, asyncio.IncompleteReadError) as exc:
+                await _send_json(writer, 400, {'error': f"Malformed request: {exc}"})
+                return
+            if method == 'OPTIONS':
+                await _send(writer, 204, b'', 'text/plain')
+            elif path == '/health':
+                await _send_json(writer, 200, {'status': 'ok', 'cached': len(self.cache.results), 'pending': len(self.pending),
+                                               'running': len(self.running), 'batches': self.batches})
+            elif path not in ('/run', '/sweep'):
+                await _send_json(writer, 404, {'error': f"No endpoint {path}"})
+            elif method != 'POST':
+                await _send_json(writer, 405, {'error': f"{path} expects POST"})
+            else:
+                try:
+                    spec = json.loads(body or b'{}')
+                    stream = bool(spec.pop('stream', False)) if isinstance(spec, dict) else False
+                    runs = self.plan(spec, allow_sweep=(path == '/sweep'))
+                except (ValueError, TypeError, KeyError) as exc:
+                    await _send_json(writer, 400, {'error': str(exc)})
+                    return
+                if path == '/run' and stream:
+                    await self._stream_run(writer, runs[0])
+                elif path == '/run':
+                    future, _ = self.submit(runs[0])
+                    try:
+                        result = await future
+                    except Exception as exc:
+                        await _send_json(writer, 500, {'error': f"Run failed: {exc}"})
+                        return
+                    await _send_json(writer, 200, {'result': result})
+                else:
+                    results = await asyncio.gather(*(self.submit(run)[0] for run in runs), return_exceptions=True)
+                    await _send_json(writer, 200, {'runs': [_sweep_entry(run, result) for run, result in zip(runs, results)]})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _stream_run(self, writer, run):
+        future, queue = self.submit(run, stream=True)
+        writer.write(('HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n'
+                      f'{CORS_HEADERS}Connection: close\r\n\r\n').encode())
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            await _write_chunk(writer, {'chunk': chunk})
+        try:
+            await _write_chunk(writer, {'result': await future})
+        except Exception as exc:
+            await _write_chunk(writer, {'error': f"Run failed: {exc}"})
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+
+def _fail(job, exc):
+    if not job.result.done():
+        job.result.set_exception(exc)
+    for queue in job.streams:
+        queue.put_nowait(None)
+
+
+def _advance_batch(worlds, k, limits, records):
+    # Like advance_ensemble, but a world that raises is reported in `errors`
+    # instead of failing the rest of the batch.
+    steps, errors = [], []
+    for world, limit, record in zip(worlds, limits, records):
+        try:
+            steps.append(advance(world, min(k, limit - world.time), record) if world.time < limit else 0)
+            errors.append(None)
+        except Exception as exc:
+            steps.append(0)
+            errors.append(exc)
+    return steps, errors
+
+
+def _sweep_entry(run, result):
+    entry = {'settings': run['settings'], 'seed': run['seed'], 'replicate': run['replicate']}
+    if isinstance(result, Exception):
+        entry['error'] = f"Run failed: {result}"
+    else:
+        entry['result'] = result
+    return entry
+
+
+# --- Validation ---
+
+STOCHASTIC_LIMITS = {'noise': (0.0, 1.0), 'luminosity_noise': (0.0, 0.1)} # 0.1 keeps 1 + sigma * N(0, 1) positive
+SCHEDULE_PARAMS = { # kind -> (required, optional) parameters
+    'constant': (('value',), ()),
+    'ramp': (('start', 'rate'), ('limit',)),
+    'piecewise': (('points',), ()),
+    'sinusoid': (('base', 'amplitude', 'period'), ('phase',)),
+    'stochastic': (('base', 'sigma'), ('tau', 'seed')),
+}
+SCHEDULE_LIMIT = 1e6 # largest magnitude of any forcing parameter
+REQUEST_KEYS = ('settings', 'sweep', 'luminosity', 'forcing', 'seeds', 'stochastic', 'tabulated', 'stop')
+
+
+def _check_number(value, what, low=-math.inf, high=math.inf):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{what} must be a number, got {value!r}")
+    if not low <= value <= high:
+        raise ValueError(f"{what} must be from {low} to {high}, got {value!r}")
+
+
+def _check_int(value, what, low, high):
+    if isinstance(value, bool) or not isinstance(value, int) or not low <= value <= high:
+        raise ValueError(f"{what} must be an integer from {low} to {high}, got {value!r}")
+
+
+def _check_setting(key, value, what):
+    # The same ranges the settings screen allows, so every request is a world the UI could build.
+    if key not in DEFAULT_SETTINGS:
+        raise ValueError(f"Unknown setting '{key}', expected one of {sorted(DEFAULT_SETTINGS)}")
+    low, high = DEFAULT_SETTINGS[key]['min'], DEFAULT_SETTINGS[key]['max']
+    if key in INT_SETTINGS:
+        _check_int(value, what, low, high)
+    else:
+        _check_number(value, what, low, high)
+
+
+def _check_schedule(spec, what):
+    # Mirrors DaisyWorldForcing.schedule_from_spec, checking every parameter
+    # before the run is queued rather than when it is compiled.
+    if not isinstance(spec, dict):
+        _check_number(spec, what, -SCHEDULE_LIMIT, SCHEDULE_LIMIT)
+        return
+    kind = spec.get('kind')
+    if kind == 'file':
+        raise ValueError("File-driven forcing isn't available over HTTP") # it reads the server's disk
+    if kind not in SCHEDULE_PARAMS:
+        raise ValueError(f"{what}.kind must be one of {sorted(SCHEDULE_PARAMS)}, got {kind!r}")
+    required, optional = SCHEDULE_PARAMS[kind]
+    for key in spec:
+        if key != 'kind' and key not in required + optional:
+            raise ValueError(f"Unknown {kind} parameter {what}.{key}")
+    for key in required:
+        if key not in spec:
+            raise ValueError(f"{what} needs '{key}'")
+    for key, value in spec.items():
+        if key == 'base':
+            _check_schedule(value, f"{what}.base")
+        elif key == 'points':
+            if not isinstance(value, list) or not value:
+                raise ValueError(f"{what}.points must be a non-empty list of [time, value] pairs")
+            for point in value:
+                if not isinstance(point, list) or len(point) != 2:
+                    raise ValueError(f"{what}.points must be [time, value] pairs, got {point!r}")
+                for number in point:
+                    _check_number(number, f"{what}.points", -SCHEDULE_LIMIT, SCHEDULE_LIMIT)
+        elif key == 'period':
+            _check_number(value, f"{what}.period", 1e-3, SCHEDULE_LIMIT)
+        elif key in ('sigma', 'tau'):
+            _check_number(value, f"{what}.{key}", 0.0, SCHEDULE_LIMIT)
+        elif key == 'seed':
+            _check_int(value, f"{what}.seed", 0, 2 ** 63)
+        elif key != 'kind':
+            _check_number(value, f"{what}.{key}", -SCHEDULE_LIMIT, SCHEDULE_LIMIT)
+
+
+def _validate(spec):
+    # Checks types, ranges and sizes up front, so a bad request is a 400 rather
+    # than a failure half way through a batch, and no request can ask for
+    # unbounded work.
+    for key in spec:
+        if key not in REQUEST_KEYS:
+            raise ValueError(f"Unknown request key '{key}', expected one of {', '.join(REQUEST_KEYS)}")
+    for key in ('settings', 'sweep', 'luminosity', 'forcing', 'stochastic', 'stop'):
+        if not isinstance(spec.get(key, {}), dict):
+            raise ValueError(f"'{key}' must be an object")
+    for key, value in spec.get('settings', {}).items():
+        _check_setting(key, value, f"settings.{key}")
+    runs = 1
+    for key, values in spec.get('sweep', {}).items():
+        if not isinstance(values, list) or not values:
+            raise ValueError(f"sweep.{key} must be a non-empty list")
+        for value in values:
+            _check_setting(key, value, f"sweep.{key}")
+        runs *= len(values)
+    for key, value in spec.get('luminosity', {}).items():
+        if key == 'start':
+            _check_setting('start_luminosity', value, "luminosity.start")
+        elif key == 'rate':
+            _check_setting('luminosity_change', value, "luminosity.rate")
+        elif key == 'max':
+            _check_number(value, "luminosity.max", 0.0, SCHEDULE_LIMIT)
+        else:
+            raise ValueError(f"Unknown luminosity option '{key}', expected start, rate or max")
+    for key, value in spec.get('forcing', {}).items():
+        _check_schedule(value, f"forcing.{key}")
+    tabulated = spec.get('tabulated', False)
+    if not isinstance(tabulated, (bool, dict)):
+        raise ValueError("'tabulated' must be true, false or an object")
+    for key, value in (tabulated if isinstance(tabulated, dict) else {}).items():
+        if key not in ('temp_points', 'growth_points'):
+            raise ValueError(f"Unknown tabulated option '{key}', expected temp_points or growth_points")
+        _check_int(value, f"tabulated.{key}", 2, 65536)
+    stochastic = spec.get('stochastic', {})
+    for key, value in stochastic.items():
+        if key == 'replicates':
+            _check_int(value, "stochastic.replicates", 1, MAX_RUNS)
+        elif key in STOCHASTIC_LIMITS:
+            _check_number(value, f"stochastic.{key}", *STOCHASTIC_LIMITS[key])
+        else:
+            raise ValueError(f"Unknown stochastic option '{key}', expected noise, luminosity_noise or replicates")
+    seeds = spec.get('seeds', [0])
+    if not isinstance(seeds, list) or not seeds:
+        raise ValueError("'seeds' must be a non-empty list")
+    for seed in seeds:
+        _check_int(seed, "seeds", 0, 2 ** 63)
+    runs *= len(seeds) * stochastic.get('replicates', 1)
+    if runs > MAX_RUNS:
+        raise ValueError(f"Request expands to {runs} runs, more than the limit of {MAX_RUNS}")
+    stop = spec.get('stop', {})
+    max_steps = stop.get('max_steps', MAX_STEPS)
+    _check_int(max_steps, "stop.max_steps", 1, MAX_STEPS)
+    if runs * max_steps > MAX_TOTAL_STEPS:
+        raise ValueError(f"Request asks for {runs} runs of up to {max_steps} steps, more than the limit of "
+                         f"{MAX_TOTAL_STEPS} steps in total; lower stop.max_steps or run fewer combinations")
+    if not isinstance(stop.get('events', []), list):
+        raise ValueError("stop.events must be a list")
+
+
+async def _read_request(reader):
+    request_line = (await reader.readline()).decode('latin-1').split()
+    if len(request_line) != 3:
+        raise ValueError("bad request line")
+    method, target, _ = request_line
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', 0))
+    if length > MAX_BODY:
+        raise ValueError("body too large")
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), target.split('?', 1)[0], body
+
+
+async def _send(writer, status, body, content_type):
+    writer.write((f'HTTP/1.1 {status} {STATUS[status]}\r\nContent-Type: {content_type}\r\n'
+                  f'Content-Length: {len(body)}\r\n{CORS_HEADERS}Connection: close\r\n\r\n').encode() + body)
+    await writer.drain()
+
+
+async def _send_json(writer, status, payload):
+    await _send(writer, status, json.dumps(payload).encode(), 'application/json')
+
+
+async def _write_chunk(writer, payload):
+    data = json.dumps(payload).encode() + b'\n'
+    writer.write(f'{len(data):X}\r\n'.encode() + data + b'\r\n')
+    await writer.drain()
+
+
+async def serve(host='127.0.0.1', port=8765, **options):
+    service = SimulationService(**options)
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"Daisyworld service on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Daisyworld simulations over HTTP/JSON.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--batch-window', type=float, default=0.005, help="seconds to wait for requests to coalesce")
+    parser.add_argument('--chunk', type=int, default=500, help="steps per streamed chunk")
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, batch_window=args.batch_window, chunk=args.chunk))
+
+
+if __name__ == '__main__':
+    main()
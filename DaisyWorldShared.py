@@ -0,0 +1,253 @@
+"""A multi-process sweep backend that shares its data instead of pickling it.
+
+The parameter matrix and every result array live in
+`multiprocessing.shared_memory` blocks. Workers attach to the blocks once,
+read their rows of parameters and write their results in place by row
+index. The parent only hands out (start, stop) index ranges, so nothing
+per run crosses a process boundary: no settings dicts, no histories.
+
+Workers keep no history either. The collapse time is found chunk by chunk as
+the run advances. With `collapse=False` (`--no-collapse`) runs skip recording
+altogether and go through the kernel with `record=False`.
+
+    python DaisyWorldShared.py --sweep heating_effect=0:50:2 --sweep death_rate=0.1:1:0.05 \\
+        --max-steps 20000 --output sweep.csv
+"""
+import argparse
+import csv
+import itertools
+import math
+import os
+from array import array
+from multiprocessing import Pool, shared_memory
+
+import DaisyWorldKernel
+from DaisyWorldBatch import make_settings, make_stop_events
+from DaisyWorldModel import DEFAULT_SETTINGS, Daisyworld
+
+PARAM_COLUMNS = list(DEFAULT_SETTINGS) + ['max_luminosity', 'max_steps']
+FLOAT_RESULTS = ['final_temp', 'final_white', 'final_black', 'final_luminosity', 'collapse_time']
+INT_RESULTS = ['end_code', 'steps']
+INT_PARAMS = ('stability_turns', 'max_steps') # stored as doubles like the rest, so checked to be whole
+COLLAPSE_COVER = 1.0 # percent total daisy cover counted as collapse
+CHUNK = 4096 # steps per kernel call; the history of one chunk is all a worker holds
+END_EVENT = -1 # end_code of a run stopped by one of the stop events
+
+
+def _attach(name):
+    # Workers share the parent's resource tracker, so attaching must not hand the
+    # block to a tracker of their own that would unlink it when they exit.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError: # Python < 3.13 has no track argument; the shared tracker dedups
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedArrays:
+    """The parameter matrix and result columns of a sweep, as shared memory views."""
+    def __init__(self, rows, names=None):
+        self.rows = rows
+        self.owner = names is None
+        sizes = {'params': 8 * rows * len(PARAM_COLUMNS)}
+        sizes.update({name: 8 * rows for name in FLOAT_RESULTS})
+        sizes.update({name: 4 * rows for name in INT_RESULTS})
+        if self.owner:
+            self.blocks = {key: shared_memory.SharedMemory(create=True, size=max(1, size)) for key, size in sizes.items()}
+        else:
+            self.blocks = {key: _attach(names[key]) for key in sizes}
+        self.params = self.blocks['params'].buf.cast('d')
+        self.columns = {name: self.blocks[name].buf.cast('d') for name in FLOAT_RESULTS}
+        self.columns.update({name: self.blocks[name].buf.cast('i') for name in INT_RESULTS})
+
+    @property
+    def names(self):
+        return {key: block.name for key, block in self.blocks.items()}
+
+    def param(self, row, column):
+        return self.params[row * len(PARAM_COLUMNS) + PARAM_COLUMNS.index(column)]
+
+    def close(self):
+        self.params.release()
+        for view in self.columns.values():
+            view.release()
+        for block in self.blocks.values():
+            block.close()
+            if self.owner:
+                block.unlink()
+
+
+class CollapseWatch:
+    """The interpolated time total cover first falls below COLLAPSE_COVER percent, fed one history chunk at a time."""
+    def __init__(self):
+        self.prev_time = 0
+        self.prev_cover = None
+        self.time = math.nan
+
+    def feed(self, history):
+        if not math.isnan(self.time):
+            return
+        prev_time, prev_cover = self.prev_time, self.prev_cover
+        for time, white, black in zip(history['time'], history['white'], history['black']):
+            cover = white + black
+            if prev_cover is not None and prev_cover >= COLLAPSE_COVER > cover:
+                self.time = prev_time + (prev_cover - COLLAPSE_COVER) / (prev_cover - cover) * (time - prev_time)
+                return
+            prev_time, prev_cover = time, cover
+        self.prev_time, self.prev_cover = prev_time, prev_cover
+
+
+# --- Workers ---
+
+_worker = {}
+
+
+def _init_worker(rows, names, stop_events, collapse):
+    _worker['arrays'] = SharedArrays(rows, names)
+    _worker['stop_events'] = stop_events
+    _worker['collapse'] = collapse
+
+
+def run_rows(arrays, start, stop, stop_events=(), collapse=True):
+    """Runs rows start .. stop-1 of the parameter matrix, writing results in place.
+
+    With `collapse=False` no history is recorded and collapse_time is NaN.
+    """
+    columns = arrays.columns
+    width = len(PARAM_COLUMNS)
+    for row in range(start, stop):
+        values = dict(zip(PARAM_COLUMNS, arrays.params[row * width:(row + 1) * width]))
+        values['stability_turns'] = int(values['stability_turns'])
+        max_steps = int(values.pop('max_steps'))
+        world = Daisyworld(make_settings({k: values[k] for k in DEFAULT_SETTINGS}))
+        world.max_luminosity = values['max_luminosity']
+        world.add_event(make_stop_events({'events': list(stop_events)}))
+        watch = CollapseWatch()
+        while world.end_reason is None and world.time < max_steps:
+            DaisyWorldKernel.advance(world, min(CHUNK, max_steps - world.time), record=collapse)
+            if collapse:
+                watch.feed(world.history)
+                for series in world.history.values():
+                    series.clear()
+        columns['end_code'][row] = DaisyWorldKernel.END_CODES.get(world.end_reason, END_EVENT)
+        columns['steps'][row] = world.time
+        columns['final_temp'][row] = world.planetary_temp if world.time else math.nan
+        columns['final_white'][row] = world.frac_white * 100
+        columns['final_black'][row] = world.frac_black * 100
+        columns['final_luminosity'][row] = world.solar_luminosity
+        columns['collapse_time'][row] = watch.time
+    return stop - start
+
+
+def _run_range(start, stop):
+    return run_rows(_worker['arrays'], start, stop, _worker['stop_events'], _worker['collapse'])
+
+
+# --- Parent ---
+
+class SharedSweep:
+    """A sweep over rows of parameters, executed by worker processes in shared memory.
+
+    `rows` is a list of dicts; any PARAM_COLUMNS missing from a row take their
+    defaults. `stop_events` are experiment-file stop event names, shared by
+    every row. `collapse=False` skips the collapse time and with it all
+    history recording. Use as a context manager, or call close(), to free
+    the blocks.
+    """
+    def __init__(self, rows, max_steps=20000, stop_events=(), collapse=True):
+        defaults = {key: params['value'] for key, params in DEFAULT_SETTINGS.items()}
+        defaults.update(max_luminosity=1.8, max_steps=max_steps)
+        self.stop_events = tuple(stop_events)
+        self.collapse = collapse
+        make_stop_events({'events': list(self.stop_events)}) # validate before any worker starts
+        matrix = [_param_row({**defaults, **row}, set(row) - set(PARAM_COLUMNS)) for row in rows]
+        self.arrays = SharedArrays(len(rows)) # only once every row is known to be good, so nothing leaks
+        width = len(PARAM_COLUMNS)
+        for i, values in enumerate(matrix):
+            self.arrays.params[i * width:(i + 1) * width] = array('d', values)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.arrays.close()
+
+    def run(self, workers=None, chunk=None):
+        """Executes every row; workers=1 runs in this process."""
+        rows = self.arrays.rows
+        workers = workers or os.cpu_count() or 1
+        if workers == 1:
+            run_rows(self.arrays, 0, rows, self.stop_events, self.collapse)
+            return
+        chunk = chunk or max(1, math.ceil(rows / (workers * 4)))
+        ranges = [(start, min(start + chunk, rows)) for start in range(0, rows, chunk)]
+        with Pool(workers, _init_worker, (rows, self.arrays.names, self.stop_events, self.collapse)) as pool:
+            pool.starmap(_run_range, ranges)
+
+    def results(self):
+        """The parameters and results of every row, as a list of dicts."""
+        width = len(PARAM_COLUMNS)
+        columns = self.arrays.columns
+        out = []
+        for row in range(self.arrays.rows):
+            record = dict(zip(PARAM_COLUMNS, self.arrays.params[row * width:(row + 1) * width]))
+            record.update({name: column[row] for name, column in columns.items()})
+            record['end_reason'] = DaisyWorldKernel.END_REASONS.get(record['end_code'], 'event')
+            out.append(record)
+        return out
+
+
+def _param_row(values, unknown):
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters {sorted(unknown)}")
+    row = [float(values[column]) for column in PARAM_COLUMNS]
+    for key in INT_PARAMS:
+        value = row[PARAM_COLUMNS.index(key)]
+        if not value.is_integer() or value < 1:
+            raise ValueError(f"{key} must be a whole number of at least 1, got {values[key]!r}")
+    return row
+
+
+def grid(axes):
+    """Every combination of the given parameter -> values lists, as sweep rows."""
+    return [dict(zip(axes, combo)) for combo in itertools.product(*axes.values())]
+
+
+def _parse_axis(text):
+    # name=start:stop:step (inclusive of stop) or name=v1,v2,...
+    name, _, spec = text.partition('=')
+    if ':' in spec:
+        start, stop, step = (float(v) for v in spec.split(':'))
+        count = int(round((stop - start) / step)) + 1
+        values = [round(start + i * step, 10) for i in range(count)]
+    else:
+        values = [float(v) for v in spec.split(',')]
+    return name, values
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a parameter sweep in shared memory worker processes.")
+    parser.add_argument('--sweep', action='append', default=[], metavar='NAME=START:STOP:STEP',
+                        help=f"parameter axis, repeatable; one of {', '.join(PARAM_COLUMNS)}")
+    parser.add_argument('--max-steps', type=int, default=20000)
+    parser.add_argument('--stop', action='append', default=[], help="stop event name, e.g. outcome")
+    parser.add_argument('--no-collapse', action='store_true', help="skip the collapse time and run without recording history")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default='sweep.csv')
+    args = parser.parse_args()
+    rows = grid(dict(_parse_axis(axis) for axis in args.sweep))
+    with SharedSweep(rows, args.max_steps, args.stop, not args.no_collapse) as sweep:
+        sweep.run(args.workers)
+        results = sweep.results()
+    columns = PARAM_COLUMNS + ['end_reason'] + INT_RESULTS + FLOAT_RESULTS
+    with open(args.output, 'w', newline='') as f:
+        writer = csv.DictWriter(f, columns, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(results)
+    print(f"{len(rows)} runs -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Measures time from launch to the first frame being drawn.
+
+Starts the viewer with DAISYWORLD_EXIT_AFTER_FIRST_FRAME set, so it quits
+right after its first display.flip(), and times each launch. It can time
+the source version or a frozen build:
+
+    python DaisyWorldStartup.py                              # python DaisyWorld.py
+    python DaisyWorldStartup.py dist/DaisyWorld/DaisyWorld   # DaisyWorldFast.spec build
+    python DaisyWorldStartup.py dist/DaisyWorld.exe          # DaisyWorld.spec one-file build
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+# Time-to-first-frame goal. Measured medians on a one-core Linux VM with
+# SDL_VIDEODRIVER=dummy: DaisyWorldFast.spec 0.25s, DaisyWorld.spec 0.86s
+# (built without UPX), python DaisyWorld.py 0.21s.
+TARGET_SECONDS = 1.0
+
+
+def time_launch(command, timeout=60):
+    """Seconds from starting `command` to its first frame; kills it after `timeout` seconds."""
+    env = dict(os.environ, DAISYWORLD_EXIT_AFTER_FIRST_FRAME='1')
+    start = time.perf_counter()
+    proc = subprocess.Popen(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    timer = threading.Timer(timeout, proc.kill) # a hung launch would otherwise block on stdout forever
+    timer.start()
+    try:
+        for line in proc.stdout:
+            if line.strip() == 'first frame':
+                elapsed = time.perf_counter() - start
+                proc.wait()
+                return elapsed
+        proc.wait()
+    finally:
+        timer.cancel()
+    if time.perf_counter() - start >= timeout:
+        raise RuntimeError(f"{command[0]} drew no frame within {timeout}s and was killed")
+    raise RuntimeError(f"{command[0]} exited (code {proc.returncode}) without drawing a frame")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time Daisyworld from launch to first frame.")
+    parser.add_argument('executable', nargs='?', help="frozen build to time (default: python DaisyWorld.py)")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--timeout', type=float, default=60, help="seconds to wait for each launch's first frame")
+    args = parser.parse_args()
+    if args.executable:
+        command = [args.executable]
+    else:
+        command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'DaisyWorld.py')]
+
+    time_launch(command, args.timeout) # warm the OS file cache so the runs are comparable
+    times = [time_launch(command, args.timeout) for _ in range(args.runs)]
+    median = statistics.median(times)
+    print(f"{' '.join(command)}")
+    print(f"  first frame: median {median:.3f}s, best {min(times):.3f}s, worst {max(times):.3f}s over {args.runs} runs")
+    print(f"  target {TARGET_SECONDS:.1f}s: {'met' if median <= TARGET_SECONDS else 'NOT met'}")
+    return 0 if median <= TARGET_SECONDS else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Lookup tables for the temperature and growth-rate functions.
+
+`TabulatedDaisyworld` swaps the fourth root in `get_planetary_temp` and the
+quadratic in `get_growth_rate` for linear interpolation on dense, uniform
+grids. Both tables are exact at the grid points; between them the error of
+linear interpolation is bounded by h^2/8 * max|f''| over the table range:
+
+* Temperature, tabulated over x = L*(1-A) in [0.05, 2.0] with 4096 points:
+  f(x) = (917*x/sigma)^0.25 - 273.15 is steepest at the low end, giving a
+  bound of about 4e-4 C, and under 1e-5 C for x > 0.3 (every temperature
+  above roughly -60 C). Outside the range the exact formula is used.
+* Growth rate, tabulated over (min_temp, max_temp) with 1024 points:
+  f''(T) = -2*0.003265 everywhere, giving a bound of about 1e-6.
+
+`error_bound` on each table holds the analytic bound, and `max_error()`
+measures the actual worst case at the cell midpoints.
+
+In CPython a table lookup costs more than the `** 0.25` it replaces, so
+`TabulatedDaisyworld` is slower than `Daisyworld` there. The tables are meant
+for builds where pow is expensive, such as Pyodide/WASM in the browser or
+vectorized ensembles; `values` and `slopes` are plain lists that can be
+handed to those directly. Experiment files and the simulation service run it
+on request with `"tabulated": true`.
+"""
+from DaisyWorldModel import Daisyworld
+
+SOLAR_FLUX = 917
+GROWTH_K = 0.003265
+
+
+class LinearTable:
+    def __init__(self, func, lo, hi, points):
+        self.func = func
+        self.lo = lo
+        self.hi = hi
+        self.step = (hi - lo) / (points - 1)
+        self.inv_step = 1 / self.step
+        self.values = [func(lo + i * self.step) for i in range(points)]
+        self.slopes = [b - a for a, b in zip(self.values, self.values[1:])] + [0.0]
+        self.last = points - 1
+
+    def __call__(self, x):
+        pos = (x - self.lo) * self.inv_step
+        i = int(pos)
+        if pos < 0 or i >= self.last:
+            return self.func(x)
+        return self.values[i] + (pos - i) * self.slopes[i]
+
+    def max_error(self):
+        """The largest interpolation error found at the midpoints of every cell."""
+        return max(abs(self(self.lo + (i + 0.5) * self.step) - self.func(self.lo + (i + 0.5) * self.step))
+                   for i in range(self.last))
+
+
+class TemperatureTable(LinearTable):
+    """Planetary temperature in C as a function of x = luminosity * (1 - albedo)."""
+    def __init__(self, stefan_boltzmann=5.67e-8, lo=0.05, hi=2.0, points=4096):
+        scale = (SOLAR_FLUX / stefan_boltzmann) ** 0.25
+        super().__init__(lambda x: scale * x ** 0.25 - 273.15, lo, hi, points)
+        step = (hi - lo) / (points - 1)
+        self.error_bound = step ** 2 / 8 * scale * 3 / 16 * lo ** -1.75
+
+
+class GrowthTable(LinearTable):
+    """Growth rate as a function of local temperature for a given growth window."""
+    def __init__(self, opt_temp, min_temp, max_temp, points=1024):
+        self.key = (opt_temp, min_temp, max_temp)
+        super().__init__(lambda t: 1.0 - GROWTH_K * ((opt_temp - t) ** 2), min_temp, max_temp, points)
+        self.error_bound = self.step ** 2 / 8 * 2 * GROWTH_K
+
+    def __call__(self, temp):
+        if self.lo < temp < self.hi:
+            pos = (temp - self.lo) * self.inv_step
+            i = int(pos)
+            return self.values[i] + (pos - i) * self.slopes[i]
+        return 0
+
+
+class TabulatedDaisyworld(Daisyworld):
+    """A Daisyworld that evaluates temperature and growth through lookup tables."""
+    def __init__(self, settings=None, temp_points=4096, growth_points=1024):
+        self.temp_points = temp_points
+        self.growth_points = growth_points
+        self.temp_table = None
+        self.growth_table = None
+        super().__init__(settings)
+
+    def reset(self, settings):
+        super().reset(settings)
+        if self.temp_table is None:
+            self.temp_table = TemperatureTable(self.stefan_boltzmann, points=self.temp_points)
+        if self.growth_table is None or self.growth_table.key != (self.opt_temp, self.min_temp, self.max_temp):
+            self.growth_table = GrowthTable(self.opt_temp, self.min_temp, self.max_temp, self.growth_points)
+
+    def get_planetary_temp(self, albedo):
+        return self.temp_table(self.solar_luminosity * (1 - albedo))
+
+    def get_growth_rate(self, temp):
+        return self.growth_table(temp)